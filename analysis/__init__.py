@@ -0,0 +1 @@
+"""Shared data layer for the Streamlit pages of the China population analysis."""
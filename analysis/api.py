@@ -0,0 +1,258 @@
+"""Read-only JSON API over the cleaned dataset, served with the standard library.
+
+Endpoints (all GET, all answering JSON):
+
+``/columns``
+    Column names and their kinds.
+``/data?columns=A,B&start=1960&end=2000``
+    Column slices, optionally restricted to a year range (both ends
+    inclusive). Without ``columns`` every column is returned.
+``/statistics?columns=A,B&quantiles=0.25,0.75``
+    Descriptive statistics (see ``analysis.describe``).
+``/periods?breakpoints=1950,1981,2000,2023&stats=mean,median&columns=A,B``
+    Per-period statistics (see ``analysis.periods``); ``stats`` are among
+    ``PERIOD_STATS``.
+
+Every response carries an ETag derived from the dataset fingerprint and the
+normalized request, and is cached under it, so a repeated request is a
+dictionary lookup and a conditional request with a matching
+``If-None-Match`` gets an empty ``304 Not Modified``. Responses say
+``Cache-Control: no-cache``: clients may keep them but revalidate.
+
+Run it standalone or next to the app::
+
+    python -m analysis.api [--host 127.0.0.1] [--port 8502]
+
+or in-process with ``start_background``.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from analysis import describe, periods, running, schema
+from analysis.loader import fingerprint, load_data
+from analysis.paths import resolve
+
+HOST = "127.0.0.1"
+PORT = 8502
+MAX_RESPONSES = 256
+# Per-period statistics a request may ask for: the ones kept up to date on append.
+PERIOD_STATS = running.SUPPORTED
+
+_responses = OrderedDict()
+_lock = threading.Lock()
+_started = {}
+
+
+def _plain(values):
+    """JSON-ready list of ``values``: missing values become null, numpy scalars Python numbers.
+
+    float32 values are written with their shortest repr (21.908, not 21.908000946044922).
+    """
+    return [
+        None if pd.isna(value)
+        else float(str(value)) if isinstance(value, np.float32)
+        else value.item() if hasattr(value, "item")
+        else value
+        for value in values
+    ]
+
+
+def _convert(name, value, convert):
+    try:
+        return convert(value)
+    except ValueError:
+        raise ValueError(f"invalid {name}: {value}") from None
+
+
+def _list(query, name, convert=str):
+    raw = query.get(name)
+    if not raw:
+        return None
+    return [_convert(name, item, convert) for item in raw[-1].split(",") if item]
+
+
+def _one(query, name, convert):
+    raw = query.get(name)
+    return _convert(name, raw[-1], convert) if raw else None
+
+
+def _check_columns(columns):
+    unknown = [column for column in columns or () if column not in schema.COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown columns: {', '.join(unknown)}")
+
+
+def columns_endpoint(query, path):
+    return {"columns": [{"name": name, "kind": kind} for name, kind in schema.COLUMNS.items()]}
+
+
+def data_endpoint(query, path):
+    columns = _list(query, "columns")
+    _check_columns(columns)
+    start, end = _one(query, "start", int), _one(query, "end", int)
+
+    data = load_data(path)
+    years = data["Year"]
+    selected = np.ones(len(data), dtype=bool)
+    if start is not None:
+        selected &= (years >= start).to_numpy()
+    if end is not None:
+        selected &= (years <= end).to_numpy()
+
+    frame = data.loc[selected, columns or list(data.columns)]
+    return {"rows": len(frame), "columns": {name: _plain(frame[name]) for name in frame.columns}}
+
+
+def statistics_endpoint(query, path):
+    columns = _list(query, "columns")
+    _check_columns(columns)
+    quantiles = tuple(_list(query, "quantiles", float) or ())
+    if not all(0 <= quantile <= 1 for quantile in quantiles):
+        raise ValueError("quantiles must be between 0 and 1")
+
+    table = describe.dataset_statistics(columns, quantiles, path=path)
+    return {
+        "statistics": list(table.columns),
+        "columns": {name: dict(zip(table.columns, _plain(row))) for name, row in zip(table.index, table.to_numpy())},
+    }
+
+
+def periods_endpoint(query, path):
+    columns = _list(query, "columns")
+    _check_columns(columns)
+    breakpoints = tuple(_list(query, "breakpoints", int) or periods.DEFAULT_BREAKPOINTS)
+    stats = tuple(_list(query, "stats") or periods.DEFAULT_STATS)
+    unknown = [stat for stat in stats if stat not in PERIOD_STATS]
+    if unknown:
+        raise ValueError(f"unknown statistics: {', '.join(unknown)}; use {', '.join(PERIOD_STATS)}")
+    if list(breakpoints) != sorted(set(breakpoints)) or len(breakpoints) < 2:
+        raise ValueError("breakpoints must be at least two increasing years")
+
+    table = periods.period_statistics(breakpoints, stats, path=path)
+    aggregated = list(dict.fromkeys(table.columns.get_level_values(0)))
+    unknown = [column for column in columns or () if column not in aggregated]
+    if unknown:
+        raise ValueError(f"no per-period statistics for: {', '.join(unknown)}")
+    names = columns or aggregated
+    return {
+        "periods": [str(label) for label in table.index],
+        "columns": {name: {stat: _plain(table[(name, stat)].to_numpy()) for stat in stats} for name in names},
+    }
+
+
+ENDPOINTS = {
+    "/columns": columns_endpoint,
+    "/data": data_endpoint,
+    "/statistics": statistics_endpoint,
+    "/periods": periods_endpoint,
+}
+
+
+def respond(target, path=None):
+    """(status, etag, body bytes) for a request target such as ``/data?columns=Year``.
+
+    Successful responses are cached under their ETag.
+    """
+    url = urlsplit(target)
+    endpoint = ENDPOINTS.get(url.path.rstrip("/") or "/")
+    if endpoint is None:
+        return HTTPStatus.NOT_FOUND, None, json.dumps({"error": f"unknown endpoint {url.path}"}).encode()
+
+    path = resolve(path)
+    query = parse_qs(url.query)
+    normalized = json.dumps(sorted((name, values[-1]) for name, values in query.items()))
+    etag = '"' + hashlib.sha1(f"{fingerprint(path)}:{url.path}:{normalized}".encode()).hexdigest() + '"'
+
+    with _lock:
+        if etag in _responses:
+            _responses.move_to_end(etag)
+            return HTTPStatus.OK, etag, _responses[etag]
+
+    try:
+        body = json.dumps(endpoint(query, path), allow_nan=False).encode()
+    except ValueError as error:
+        return HTTPStatus.BAD_REQUEST, None, json.dumps({"error": str(error)}).encode()
+
+    with _lock:
+        _responses[etag] = body
+        while len(_responses) > MAX_RESPONSES:
+            _responses.popitem(last=False)
+
+    return HTTPStatus.OK, etag, body
+
+
+class Handler(BaseHTTPRequestHandler):
+    dataset = None
+
+    def do_GET(self):
+        try:
+            status, etag, body = respond(self.path, self.dataset)
+        except Exception:
+            traceback.print_exc()
+            status, etag, body = HTTPStatus.INTERNAL_SERVER_ERROR, None, json.dumps({"error": "internal error"}).encode()
+
+        if etag is not None and etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host=HOST, port=PORT, path=None):
+    """A server for the dataset at ``path``, not yet serving; call ``serve_forever`` on it."""
+    handler = type("DatasetHandler", (Handler,), {"dataset": path})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def start_background(host=HOST, port=PORT, path=None):
+    """Serve from a daemon thread of this process, once per address; returns the server."""
+    with _lock:
+        if (host, port) not in _started:
+            server = serve(host, port, path)
+            threading.Thread(target=server.serve_forever, name="dataset-api", daemon=True).start()
+            _started[(host, port)] = server
+        return _started[(host, port)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the cleaned dataset as a JSON API.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--dataset", default=None, help="CSV file to serve (default: china.csv)")
+    arguments = parser.parse_args(argv)
+
+    server = serve(arguments.host, arguments.port, arguments.dataset)
+    print(f"Serving {resolve(arguments.dataset)} on http://{arguments.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Chart builders used by the analysis pages.
+
+Every builder takes the cleaned dataset with its derived columns (see
+``analysis.derived.load_derived``) as its first argument plus plain,
+hashable keyword parameters, and returns a finished figure. Together the
+builder and its parameters form the chart spec that ``analysis.figures``
+caches on.
+
+Density heatmaps take an optional ``bins`` parameter: when given, points are
+binned on the server (see ``analysis.binning``) instead of in the browser.
+Line charts take an optional ``budget``: the most points drawn per chart
+(see ``analysis.downsample``). Rolling statistics come from the memoized
+window engine in ``analysis.rolling``. ``country_line`` takes the long frame
+of several countries from ``analysis.registry`` instead.
+
+Plotly is imported inside the builders: ``plotly.express`` alone takes about
+half a second to import, and a page run that is served entirely from the
+figure cache should not pay for it.
+"""
+
+import numpy as np
+import pandas as pd
+
+from analysis import binning, correlation, downsample, periods, projection, rolling, schema
+
+INHABITANTS = {"Urban Population": "Urban population", "Rural Population": "Rural population"}
+
+# Country comparison charts: title -> columns drawn together.
+COMPARISONS = {
+    "Population": ("Population",),
+    "Population density": ("Population Density",),
+    "Urban/rural population": ("Urban Population", "Rural Population"),
+    "Birth/death rates": ("Birth Rate", "Death Rate"),
+    "Fertility rate": ("Fertility Rate",),
+    "Life expectancy": ("Life Expectancy",),
+    "Migration": ("Net Migration Rate",),
+}
+LAYOUTS = ("overlay", "facet")
+
+
+def population_bar(data):
+    import plotly.express as px
+
+    return px.bar(data, x="Year", y="Population", color="Population", title="China population")
+
+
+def population_density_line(data, budget=None):
+    import plotly.express as px
+
+    frame = downsample.reduce(data, "Year", "Population Density", budget)
+    return px.line(frame, x="Year", y="Population Density", title="Grow in population density", markers=True)
+
+
+def inhabitants_bar(data, breakpoints, stat):
+    import plotly.express as px
+
+    table = periods.aggregate(data, breakpoints, (stat,), list(INHABITANTS))
+    frame = periods.melt(table, stat, INHABITANTS, "Inhabitants", "Population")
+    title = f"{stat.capitalize()} value of urban and rural population in China"
+    return px.bar(frame, x="Period", y="Population", color="Inhabitants", title=title)
+
+
+def change_heatmap(data, column, bins=None):
+    import plotly.express as px
+
+    if bins is not None:
+        return binning.heatmap(data["Year"], data[column], bins, x_title="Year", y_title="Increase")
+
+    frame = pd.DataFrame({"Year": data["Year"], "Increase": data[column]})
+    return px.density_heatmap(frame, x="Year", y="Increase")
+
+
+def urban_rural_pie(data, breakpoints, period):
+    import plotly.graph_objects as go
+
+    columns = ["Urban Population % of Total Population", "Rural Population % of Total Population"]
+    shares = periods.aggregate(data, breakpoints, ("mean",), columns).loc[period]
+
+    figure = go.Figure()
+
+    figure.add_trace(go.Pie(
+        labels=['Urban', 'Rural'],
+        values=[shares[(columns[0], "mean")], shares[(columns[1], "mean")]],
+        marker=dict(colors=['blue', 'lightblue']),
+        textinfo='percent',
+        textposition='inside'
+    ))
+
+    figure.update_layout(
+        title_text=f'Urban/rural population {period}',
+        showlegend=False
+    )
+
+    return figure
+
+
+def urban_density_scatter(data, first=1960, last=2021):
+    import plotly.express as px
+
+    frame = data.loc[data["Year"].between(first, last), ["Year", "Urban Population", "Population Density"]]
+    frame = frame.rename(columns={"Urban Population": "Urban population", "Population Density": "Population density"})
+
+    figure = px.scatter_3d(frame, x="Population density", y="Urban population", z="Year",
+                           color="Year", size="Urban population")
+
+    figure.update_layout(title="Growth in population density",
+                         scene=dict(xaxis_title='Population density',
+                                    yaxis_title='Urban population',
+                                    zaxis_title='Year'))
+
+    return figure
+
+
+def life_expectancy_line(data, breakpoints, budget=None):
+    import plotly.express as px
+
+    frame = periods.with_periods(data, breakpoints)
+    frame = frame[["Year", "Period", "Life Expectancy"]].rename(columns={"Life Expectancy": "Life expectancy"})
+    frame = downsample.reduce(frame, "Year", "Life expectancy", budget, group="Period")
+    return px.line(frame, x="Year", y="Life expectancy", color="Period", title="Life expectancy in China", markers=True)
+
+
+def birth_death_line(data, budget=None):
+    import plotly.express as px
+
+    frame = pd.concat([
+        pd.DataFrame({"Year": data["Year"], "Rate": data["Birth Rate"], "Type": "Birth"}),
+        pd.DataFrame({"Year": data["Year"], "Rate": data["Death Rate"], "Type": "Death"}),
+    ])
+    frame = downsample.reduce(frame, "Year", "Rate", budget, group="Type")
+    return px.line(frame, x="Year", y="Rate", color="Type", title="Births and deaths in China")
+
+
+def growth_rate_line(data, budget=None):
+    import plotly.express as px
+
+    frame = data[["Year", "Growth Rate"]]
+    frame = downsample.reduce(frame, "Year", "Growth Rate", budget)
+    return px.line(frame, x="Year", y="Growth Rate", title="Growth rate")
+
+
+def infant_mortality_bar(data, breakpoints):
+    import plotly.express as px
+
+    table = periods.aggregate(data, breakpoints, ("mean",), ["Infant Mortality Rate", "Fertility Rate"])
+    frame = table.xs("mean", axis=1, level=1).rename(
+        columns={"Infant Mortality Rate": "Infant mortality rate", "Fertility Rate": "Fertility rate"}
+    ).reset_index()
+    return px.bar(frame, x="Period", y=["Infant mortality rate", "Fertility rate"], title="Infant mortality rate", barmode="group")
+
+
+def migration_line(data, breakpoints, budget=None):
+    import plotly.express as px
+
+    frame = periods.with_periods(data, breakpoints)
+    frame = frame[["Year", "Period", "Net Migration Rate"]].rename(columns={"Net Migration Rate": "Migration Rate"})
+    frame = downsample.reduce(frame, "Year", "Migration Rate", budget, group="Period")
+    return px.line(frame, x="Year", y="Migration Rate", color="Period", title="Migration", markers=True)
+
+
+def life_expectancy_heatmap(data, against, bins=None):
+    import plotly.express as px
+
+    values = data["Growth Rate" if against == "Growth Rate" else "Fertility Rate"]
+
+    if bins is not None:
+        return binning.heatmap(data["Life Expectancy"], values, bins, x_title="Life expectancy", y_title=against, colorscale="Viridis")
+
+    frame = pd.DataFrame({"Life expectancy": data["Life Expectancy"], against: values})
+    return px.density_heatmap(frame, x="Life expectancy", y=against, color_continuous_scale="Viridis")
+
+
+def rolling_line(data, column, window, stats, budget=None):
+    import plotly.express as px
+
+    series = [pd.DataFrame({"Year": data["Year"], column: data[column], "Series": column})]
+    for stat in stats:
+        values = rolling.window_statistic(data[column].to_numpy(dtype="float64", na_value=np.nan), window, stat)
+        series.append(pd.DataFrame({"Year": data["Year"], column: values, "Series": f"{window}-year {stat}"}))
+
+    frame = downsample.reduce(pd.concat(series), "Year", column, budget, group="Series")
+    return px.line(frame, x="Year", y=column, color="Series", title=f"Rolling statistics of {column.lower()}")
+
+
+def correlation_heatmap(data, method="pearson"):
+    import plotly.graph_objects as go
+
+    table, counts = correlation.matrix(data, method, list(schema.COLUMNS))
+
+    figure = go.Figure(go.Heatmap(
+        z=table.to_numpy(),
+        x=list(table.columns),
+        y=list(table.index),
+        customdata=counts.to_numpy(),
+        zmin=-1,
+        zmax=1,
+        colorscale="RdBu",
+        hovertemplate="%{y}<br>%{x}<br>r=%{z:.3f}<br>rows=%{customdata}<extra></extra>"
+    ))
+
+    figure.update_layout(title=f"{method.capitalize()} correlations", height=700, yaxis_autorange="reversed")
+    return figure
+
+
+def pair_scatter(data, x, y):
+    import plotly.express as px
+
+    frame = data[["Year", x, y]].dropna()
+    return px.scatter(frame, x=x, y=y, color="Year", title=f"{y} against {x}")
+
+
+def projection_fan(data, column, horizon=projection.HORIZON, targets=projection.TARGETS, paths=projection.PATHS):
+    import plotly.graph_objects as go
+
+    result = projection.project(data, horizon, targets, paths)
+    bands = result.bands[column]
+    outer, inner, median = (bands[0], bands[-1]), (bands[1], bands[-2]), bands[len(bands) // 2]
+
+    figure = go.Figure()
+    figure.add_trace(go.Scatter(x=data["Year"], y=data[column], name="Observed", line=dict(color="black")))
+
+    for (low, high), name, opacity in [(outer, "90% of scenarios", 0.2), (inner, "50% of scenarios", 0.4)]:
+        figure.add_trace(go.Scatter(x=result.years, y=high, line=dict(width=0), showlegend=False, hoverinfo="skip"))
+        figure.add_trace(go.Scatter(
+            x=result.years, y=low, name=name, fill="tonexty", line=dict(width=0),
+            fillcolor=f"rgba(31, 119, 180, {opacity})"
+        ))
+
+    figure.add_trace(go.Scatter(x=result.years, y=median, name="Median scenario", line=dict(color="rgb(31, 119, 180)")))
+    figure.update_layout(title=f"Projected {column.lower()} to {horizon}", xaxis_title="Year", yaxis_title=column)
+    return figure
+
+
+def country_line(data, columns, layout="overlay", budget=None):
+    import plotly.express as px
+
+    if layout not in LAYOUTS:
+        raise ValueError(f"unknown layout: {layout}")
+
+    frame = data[["Country", "Year", *columns]].melt(id_vars=["Country", "Year"], var_name="Series", value_name="Value")
+    frame = downsample.reduce(frame, "Year", "Value", budget, group=["Country", "Series"])
+    title = " and ".join(columns)
+
+    if layout == "facet":
+        figure = px.line(frame, x="Year", y="Value", color="Series", facet_col="Country", facet_col_wrap=3, title=title)
+        figure.for_each_annotation(lambda annotation: annotation.update(text=annotation.text.split("=")[-1]))
+        return figure
+
+    return px.line(frame, x="Year", y="Value", color="Country", line_dash="Series" if len(columns) > 1 else None, title=title)
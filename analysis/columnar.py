@@ -0,0 +1,138 @@
+"""Persisted binary copy of the cleaned dataset.
+
+Parsing text is the dominant cost of a cold start, so the cleaned frame is
+also written next to the CSV as an Arrow IPC (Feather v2) file. The file
+carries the content fingerprint of the CSV it was built from in its schema
+metadata; ``load`` memory-maps it whenever that fingerprint still matches
+and falls back to parsing (and rewriting the cache) otherwise.
+
+Build or refresh the cache ahead of a deployment with::
+
+    python -m analysis.columnar [CSV ...] [--force]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from analysis import profiling, schema
+from analysis.paths import DATA_PATH, resolve
+
+SUFFIX = ".feather"
+FINGERPRINT_KEY = b"source_fingerprint"
+
+
+def cache_path(path=None):
+    return resolve(path).with_suffix(SUFFIX)
+
+
+def hasher():
+    """SHA-256 hasher primed with the column schema; fed the CSV bytes, it gives their fingerprint.
+
+    ``analysis.ingest`` continues such a hasher over appended bytes, so the
+    fingerprint of a grown file never needs the whole file read again.
+    """
+    digest = hashlib.sha256(repr(sorted(schema.COLUMNS.items())).encode())
+    digest.update(repr(sorted(schema.DTYPES.items())).encode())
+    return digest
+
+
+def content_fingerprint(path=None):
+    """SHA-256 of the CSV bytes and the column schema used to parse them."""
+    digest = hasher()
+
+    with open(resolve(path), "rb") as source:
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def stored_fingerprint(path=None):
+    """Fingerprint recorded in the cache file, or None if there is no usable cache."""
+    target = cache_path(path)
+    try:
+        with pa.memory_map(str(target)) as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    value = metadata.get(FINGERPRINT_KEY)
+    return value.decode() if value is not None else None
+
+
+def write(data, path=None, fingerprint=None):
+    """Write ``data`` as the cache of ``path`` atomically."""
+    fingerprint = fingerprint or content_fingerprint(path)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[FINGERPRINT_KEY] = fingerprint.encode()
+    table = table.replace_schema_metadata(metadata)
+
+    target = cache_path(path)
+    temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    feather.write_feather(table, temporary, compression="uncompressed")
+    os.replace(temporary, target)
+    return target
+
+
+def build(path=None, force=False):
+    """Parse ``path`` and write its cache unless an up-to-date one exists.
+
+    Returns True when the cache was (re)written.
+    """
+    fingerprint = content_fingerprint(path)
+    if not force and stored_fingerprint(path) == fingerprint:
+        return False
+
+    write(schema.read_csv(resolve(path)), path, fingerprint)
+    return True
+
+
+def load(path=None, fingerprint=None):
+    """Return the cleaned frame, from the binary cache when it is current.
+
+    ``fingerprint`` is the ``content_fingerprint`` of ``path`` when the
+    caller has already computed it.
+
+    The uncompressed Feather file is memory-mapped, so reading it costs no
+    parsing, but ``to_pandas`` still copies every column into pandas-owned
+    arrays: the frame is as large in memory as a parsed one. A stale or
+    missing cache is rebuilt on the way; failing to write it (e.g. on a
+    read-only deployment) is not an error.
+    """
+    fingerprint = fingerprint or content_fingerprint(path)
+    if stored_fingerprint(path) == fingerprint:
+        table = feather.read_table(cache_path(path), memory_map=True)
+        return table.to_pandas()
+
+    with profiling.stage("clean", resolve(path).name):
+        data = schema.read_csv(resolve(path))
+    try:
+        write(data, path, fingerprint)
+    except OSError:
+        pass
+    return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the binary cache of cleaned CSV datasets.")
+    parser.add_argument("paths", nargs="*", default=[str(DATA_PATH)], help="CSV files to cache (default: china.csv)")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the cache is up to date")
+    arguments = parser.parse_args(argv)
+
+    for path in arguments.paths:
+        if build(path, force=arguments.force):
+            print(f"{cache_path(path)}: written")
+        else:
+            print(f"{cache_path(path)}: up to date")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
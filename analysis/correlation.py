@@ -0,0 +1,96 @@
+"""Pearson and Spearman correlation matrices over the numeric columns.
+
+Missing values are handled pairwise, like ``DataFrame.corr``: every pair of
+columns is correlated over the rows where both are present. Columns are
+grouped by their pattern of missing values (the dataset has two: complete
+columns and the urban/rural ones that are Null before 1960), and each pair
+of patterns is handled as one dense block: its rows are the ones both
+patterns keep, the block is ranked for Spearman, and one ``np.corrcoef``
+call gives all of its pairs. The matrix therefore costs a handful of
+vectorized passes instead of one computation per pair.
+
+Results for the loaded dataset are memoized per dataset fingerprint and
+year range.
+"""
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+from analysis import memory, profiling, years as year_range
+from analysis.loader import fingerprint, load_data
+from analysis.paths import resolve
+
+METHODS = ("pearson", "spearman")
+
+
+def _patterns(present):
+    """Column indices grouped by identical missing-value pattern."""
+    _, inverse = np.unique(present.T, axis=0, return_inverse=True)
+    return [np.flatnonzero(inverse.ravel() == group) for group in range(inverse.max() + 1)]
+
+
+def matrix(data, method="pearson", columns=None):
+    """Correlation matrix of ``columns`` (all numeric columns by default) and pair counts.
+
+    Returns ``(correlations, counts)``, two square frames indexed by column
+    name; ``counts`` holds the number of rows each pair was computed over.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown correlation method: {method}")
+    if columns is None:
+        columns = list(data.select_dtypes("number").columns)
+    columns = list(columns)
+
+    block = data[columns].to_numpy(dtype="float64", na_value=np.nan)
+    present = ~np.isnan(block)
+    counts = present.T.astype("int64") @ present.astype("int64")
+    result = np.full((len(columns), len(columns)), np.nan)
+
+    groups = _patterns(present)
+    for first, left in enumerate(groups):
+        for right in groups[first:]:
+            union = np.union1d(left, right)
+            rows = present[:, left[0]] & present[:, right[0]]
+            if rows.sum() < 2:
+                continue
+
+            values = block[np.ix_(rows, union)]
+            if method == "spearman":
+                values = pd.DataFrame(values).rank().to_numpy()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                local = np.atleast_2d(np.corrcoef(values, rowvar=False))
+
+            position = np.searchsorted(union, left)[:, None], np.searchsorted(union, right)
+            result[left[:, None], right] = local[position]
+            result[right[:, None], left] = local[position].T
+
+    index = pd.Index(columns, name="Column")
+    return (
+        pd.DataFrame(result, index=index, columns=columns),
+        pd.DataFrame(counts, index=index, columns=columns),
+    )
+
+
+def correlations(method="pearson", path=None, years=None):
+    """``matrix`` over the loaded dataset, memoized. The results are shared and read-only.
+
+    ``years`` restricts the rows to an inclusive (first, last) range.
+    """
+    path = resolve(path)
+    return _correlations(path, fingerprint(path), method, years)
+
+
+def pair(first, second, path=None, years=None):
+    """Pearson and Spearman coefficients and the row count of one pair of columns."""
+    pearson, counts = correlations("pearson", path, years)
+    spearman, _ = correlations("spearman", path, years)
+    return pearson.at[first, second], spearman.at[first, second], int(counts.at[first, second])
+
+
+@functools.lru_cache(maxsize=16)
+def _correlations(path, key, method, years):
+    data = year_range.select(load_data(path), years)
+    with profiling.stage("aggregate", f"{method} correlations"):
+        return tuple(memory.freeze(frame) for frame in matrix(data, method))
@@ -0,0 +1,161 @@
+"""Derived columns computed from the cleaned dataset.
+
+Every derived column is registered once, with the base columns it depends
+on and how many earlier rows it looks back at (``lag``). ``compute`` evaluates
+the whole registry with vectorized column arithmetic. When the base data
+changes, ``update`` compares the old and new frames and recomputes only the
+derived columns whose dependencies changed, and only over the changed rows
+plus the rows within ``lag`` after them; appended rows count as changed.
+
+``load_derived`` returns the loaded dataset with the derived columns
+appended. It keeps the previous version of both frames per file so that a
+replaced CSV is handled by ``update`` rather than a full recompute.
+"""
+
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from analysis import memory, profiling
+from analysis.loader import fingerprint, load_data
+from analysis.paths import resolve
+
+Metric = namedtuple("Metric", ["dependencies", "function", "lag"])
+
+REGISTRY = {}
+
+_store = {}
+_lock = threading.Lock()
+
+
+def register(name, dependencies, lag=0):
+    """Decorator adding ``function(frame) -> Series`` to the registry as ``name``."""
+    def decorator(function):
+        REGISTRY[name] = Metric(tuple(dependencies), function, lag)
+        return function
+
+    return decorator
+
+
+@register("Growth Rate", ["Birth Rate", "Death Rate"])
+def growth_rate(frame):
+    return (frame["Birth Rate"] - frame["Death Rate"]) / 10
+
+
+@register("Urban Share", ["Urban Population", "Population"])
+def urban_share(frame):
+    return frame["Urban Population"].astype("float64") / frame["Population"].astype("float64") * 100
+
+
+@register("Rural Share", ["Rural Population", "Population"])
+def rural_share(frame):
+    return frame["Rural Population"].astype("float64") / frame["Population"].astype("float64") * 100
+
+
+def _year_over_year(column):
+    def change(frame):
+        values = frame[column].astype("float64")
+        return (values / values.shift(1) - 1) * 100
+
+    return change
+
+
+YEAR_OVER_YEAR = [
+    "Population",
+    "Population Density",
+    "Urban Population",
+    "Rural Population",
+    "Life Expectancy",
+    "Birth Rate",
+    "Death Rate",
+    "Infant Mortality Rate",
+    "Fertility Rate",
+]
+
+for _column in YEAR_OVER_YEAR:
+    register(f"{_column} YoY %", [_column], lag=1)(_year_over_year(_column))
+
+
+def _evaluate(metric, frame):
+    return metric.function(frame).astype("float32").to_numpy()
+
+
+def compute(data, names=None):
+    """All registered columns (or ``names``) for ``data``, as a frame on its index."""
+    names = list(REGISTRY) if names is None else list(names)
+    return pd.DataFrame({name: _evaluate(REGISTRY[name], data) for name in names}, index=data.index)
+
+
+def _changes(old, new):
+    """Per base column, a boolean array over the rows of ``new`` marking changed or new rows."""
+    common = len(old)
+    changes = {}
+    for column in new.columns:
+        before = old[column].to_numpy(dtype="float64", na_value=np.nan)
+        after = new[column].iloc[:common].to_numpy(dtype="float64", na_value=np.nan)
+        changed = np.ones(len(new), dtype=bool)
+        changed[:common] = ~((before == after) | (np.isnan(before) & np.isnan(after)))
+        changes[column] = changed
+    return changes
+
+
+def update(old_base, old_derived, new_base):
+    """Derived columns for ``new_base``, reusing ``old_derived`` where nothing they depend on changed.
+
+    Falls back to ``compute`` unless ``new_base`` has the same columns as
+    ``old_base`` and starts with the same index (in-place edits and appended
+    rows are incremental; removed or reordered rows are not).
+    """
+    if (
+        list(old_base.columns) != list(new_base.columns)
+        or len(new_base) < len(old_base)
+        or not new_base.index[:len(old_base)].equals(old_base.index)
+    ):
+        return compute(new_base, old_derived.columns)
+
+    changes = _changes(old_base, new_base)
+    result = old_derived.reindex(new_base.index)
+
+    for position, name in enumerate(result.columns):
+        metric = REGISTRY[name]
+        seed = np.zeros(len(new_base), dtype=bool)
+        for dependency in metric.dependencies:
+            seed |= changes[dependency]
+
+        rows = seed.copy()
+        for offset in range(1, metric.lag + 1):
+            rows[offset:] |= seed[:-offset]
+
+        affected = np.flatnonzero(rows)
+        if not len(affected):
+            continue
+
+        start = max(affected[0] - metric.lag, 0)
+        values = _evaluate(metric, new_base.iloc[start:affected[-1] + 1])
+        result.iloc[affected, position] = values[affected - start]
+
+    return result
+
+
+def load_derived(path=None):
+    """The loaded dataset followed by every derived column. Shared and read-only."""
+    path = resolve(path)
+
+    with _lock:
+        key = fingerprint(path)
+        entry = _store.get(path)
+        if entry is not None and entry[0] == key:
+            return entry[3]
+
+        base = load_data(path)
+        with profiling.stage("aggregate", "derived columns"):
+            if entry is None:
+                derived = compute(base)
+            else:
+                derived = update(entry[1], entry[2], base)
+
+        combined = memory.freeze(pd.concat([base, derived], axis=1))
+        _store[path] = (key, base, derived, combined)
+        return combined
@@ -0,0 +1,129 @@
+"""Descriptive statistics of dataset columns.
+
+``describe`` is the exact, in-memory reference: the selected columns are
+copied once into a contiguous float64 array and every statistic is a
+NaN-aware reduction along its first axis, with the median and any extra
+quantiles from a single ``nanquantile`` call. ``benchmarks.quantiles``
+checks ``stream_statistics`` against it.
+
+``dataset_statistics``, behind the landing page's summary tables and the
+API, memoizes the statistics of the loaded dataset per dataset fingerprint.
+They come from running aggregates (``analysis.running``) rather than from
+``describe``; the values agree, but when the dataset only grew by appended
+rows the aggregates are fed just the new rows.
+
+``stream_statistics`` computes the same table from the CSV in chunks with
+sketched medians and quantiles (``analysis.sketch``), for files too large
+to load; the memoized statistics of files the loader considers
+``streamed`` come from it.
+"""
+
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analysis import memory, profiling, running, schema, sketch
+from analysis.loader import fingerprint, load_versioned, streamed
+from analysis.paths import resolve
+
+STATS = ("mean", "median", "min", "max", "range", "std")
+
+# Columns summarized on the landing page, with the labels it shows them under.
+SUMMARY_LABELS = {
+    "Population": "Population",
+    "Population Density": "Population density",
+    "Life Expectancy": "Life expectancy",
+    "Birth Rate": "Birth rate",
+    "Death Rate": "Death rate",
+}
+
+_running = {}
+_running_lock = threading.Lock()
+
+
+def describe(data, columns=None, quantiles=(), ddof=0):
+    """Statistics of ``columns`` (all numeric columns by default), one row per column.
+
+    The frame has the ``STATS`` columns followed by one ``q<quantile>``
+    column per extra quantile. Missing values are ignored.
+    """
+    if columns is None:
+        columns = list(data.select_dtypes("number").columns)
+    columns = list(columns)
+
+    block = np.ascontiguousarray(data[columns].to_numpy(dtype="float64", na_value=np.nan))
+    levels = np.nanquantile(block, [0.5, *quantiles], axis=0)
+    minimum = np.nanmin(block, axis=0)
+    maximum = np.nanmax(block, axis=0)
+
+    summary = {
+        "mean": np.nanmean(block, axis=0),
+        "median": levels[0],
+        "min": minimum,
+        "max": maximum,
+        "range": maximum - minimum,
+        "std": np.nanstd(block, axis=0, ddof=ddof),
+    }
+    for quantile, values in zip(quantiles, levels[1:]):
+        summary[f"q{quantile:g}"] = values
+
+    return pd.DataFrame(summary, index=pd.Index(columns, name="Column"))
+
+
+def _block(data, columns):
+    return data[columns].to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _from_running(state, columns, quantiles):
+    summary = {stat: state.result(stat) for stat in STATS}
+    for quantile in quantiles:
+        summary[f"q{quantile:g}"] = state.quantile(quantile)
+    return pd.DataFrame(summary, index=pd.Index(columns, name="Column"))
+
+
+def stream_statistics(path=None, columns=None, quantiles=(), accuracy=sketch.DEFAULT_K, chunk_rows=schema.CHUNK_ROWS):
+    """``describe`` of a CSV read ``chunk_rows`` rows at a time, never holding all of it.
+
+    Mean, standard deviation, minimum and maximum are exact. The median and
+    ``quantiles`` come from KLL sketches with ``k = accuracy`` (see
+    ``analysis.sketch``): exact for columns of at most ``accuracy`` values,
+    otherwise within about ``sketch.rank_error(accuracy)`` in rank.
+    """
+    columns = list(schema.COLUMNS if columns is None else columns)
+
+    state = running.RunningStatistics(len(columns), accuracy)
+    for chunk in schema.read_chunks(resolve(path), chunk_rows):
+        state.update(_block(chunk, columns))
+    return _from_running(state, columns, quantiles)
+
+
+def dataset_statistics(columns=None, quantiles=(), path=None):
+    """``describe`` over the loaded dataset, memoized. The result is shared and read-only."""
+    path = resolve(path)
+    columns = tuple(columns) if columns is not None else None
+    if streamed(path):
+        return _streamed_statistics(path, fingerprint(path), columns, tuple(quantiles))
+    return _dataset_statistics(path, fingerprint(path), columns, tuple(quantiles))
+
+
+@functools.lru_cache(maxsize=32)
+def _streamed_statistics(path, key, columns, quantiles):
+    with profiling.stage("aggregate", "streamed descriptive statistics"):
+        return memory.freeze(stream_statistics(path, columns, quantiles))
+
+
+@functools.lru_cache(maxsize=32)
+def _dataset_statistics(path, key, columns, quantiles):
+    data, generation = load_versioned(path)
+    if columns is None:
+        columns = tuple(data.select_dtypes("number").columns)
+
+    with profiling.stage("aggregate", "descriptive statistics"), _running_lock:
+        state = running.follow(
+            _running, (path, columns), data, generation,
+            start=lambda: running.RunningStatistics(len(columns)),
+            absorb=lambda state, rows: state.update(_block(rows, list(columns))),
+        )
+        return memory.freeze(_from_running(state, list(columns), quantiles))
@@ -0,0 +1,160 @@
+"""Process-wide cache of built Plotly figures.
+
+A chart is described by a spec: a builder from ``analysis.charts`` (or any
+function with the same signature) and its keyword parameters. Figures are
+cached under (dataset fingerprint, spec hash) together with the size of
+their JSON serialization, which stands for their memory in the cache budget;
+the JSON itself is not kept. The least recently used figures are evicted once
+the budget or the entry limit is exceeded.
+
+Cached figures are shared between reruns and sessions and must not be
+modified by callers; builders are expected to return finished figures.
+
+A figure can be restricted to a year range: the builder then gets a view of
+the rows in that range (``analysis.years``), and the range is part of the
+cache key. Figures comparing countries are built from the long frame of
+``analysis.registry`` instead of china.csv and are keyed on the
+fingerprints of the country files.
+
+``get_figures`` builds the missing figures of several independent specs
+concurrently, in threads or in worker processes (``analysis.workers``); the
+``CHINA_FIGURE_WORKERS`` environment variable picks the default mode.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from types import CodeType
+
+from analysis import profiling, registry, workers, years as year_range
+from analysis.derived import load_derived
+from analysis.loader import fingerprint
+from analysis.paths import resolve
+
+MAX_BYTES = 64 * 1024 * 1024
+MAX_ENTRIES = 256
+BUILD_MODE = os.environ.get("CHINA_FIGURE_WORKERS", "thread")
+
+_entries = OrderedDict()
+_size = 0
+_lock = threading.Lock()
+
+
+def _digest_code(code, digest):
+    digest.update(code.co_code)
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            _digest_code(constant, digest)
+        else:
+            digest.update(repr(constant).encode())
+
+
+def spec_hash(builder, params):
+    """Stable hash of a chart spec; changes when the builder's code changes."""
+    digest = hashlib.sha1()
+    digest.update(f"{builder.__module__}.{builder.__qualname__}".encode())
+    _digest_code(builder.__code__, digest)
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()
+
+
+def _evict():
+    global _size
+    while _entries and (_size > MAX_BYTES or len(_entries) > MAX_ENTRIES):
+        _, (size, _figure) = _entries.popitem(last=False)
+        _size -= size
+
+
+def _lookup(key):
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+        return entry
+
+
+def _store(key, size, figure):
+    global _size
+    with _lock:
+        if key in _entries:
+            return _entries[key]
+        _entries[key] = (size, figure)
+        _size += size
+        _evict()
+        return size, figure
+
+
+def _version(path, countries):
+    return fingerprint(path) if countries is None else registry.fingerprint(countries)
+
+
+def _dataset(path, years, countries):
+    data = load_derived(path) if countries is None else registry.load_countries(countries)
+    return year_range.select(data, years)
+
+
+def _entry(builder, path, params, years=None, countries=None):
+    path = resolve(path)
+    key = (_version(path, countries), years, spec_hash(builder, params))
+
+    entry = _lookup(key)
+    if entry is None:
+        data = _dataset(path, years, countries)
+        with profiling.stage("figure-build", builder.__name__):
+            figure = builder(data, **params)
+            entry = _store(key, len(figure.to_json()), figure)
+    return entry
+
+
+def get_figure(builder, path=None, years=None, countries=None, **params):
+    """Figure for ``builder(data, **params)``, built at most once per dataset version.
+
+    ``data`` is the dataset with its derived columns, from ``load_derived``,
+    or with ``countries`` (a tuple of registered country names) their long
+    frame from ``registry.load_countries``. It is restricted to ``years``
+    (an inclusive (first, last) pair) when given.
+    """
+    return _entry(builder, path, params, years, countries)[1]
+
+
+def _build(builder, path, params, years, countries):
+    figure = builder(_dataset(path, years, countries), **params)
+    return len(figure.to_json()), figure
+
+
+def get_figures(specs, path=None, mode=None, years=None, countries=None):
+    """Figures for ``(builder, params)`` specs, in order, building the missing ones concurrently.
+
+    ``mode`` is one of ``analysis.workers.MODES`` (``BUILD_MODE`` by
+    default). In ``process`` mode builders must be module-level functions;
+    the workers load the dataset themselves.
+    """
+    path = resolve(path)
+    version = _version(path, countries)
+    keys = [(version, years, spec_hash(builder, params)) for builder, params in specs]
+    entries = [_lookup(key) for key in keys]
+
+    missing = [index for index, entry in enumerate(entries) if entry is None]
+    if missing:
+        mode = mode or BUILD_MODE
+        jobs = [(specs[index][0], path, specs[index][1], years, countries) for index in missing]
+        with profiling.stage("figure-build", f"{len(jobs)} figures ({mode})"):
+            built = workers.map_jobs(_build, jobs, mode)
+        for index, (size, figure) in zip(missing, built):
+            entries[index] = _store(keys[index], size, figure)
+
+    return [entry[1] for entry in entries]
+
+
+def clear():
+    global _size
+    with _lock:
+        _entries.clear()
+        _size = 0
+
+
+def info():
+    """Number of cached figures and the size of their JSON serialization in bytes."""
+    with _lock:
+        return {"entries": len(_entries), "bytes": _size, "max_bytes": MAX_BYTES, "max_entries": MAX_ENTRIES}
@@ -0,0 +1,65 @@
+"""Appending the new trailing rows of a grown CSV to an already parsed frame.
+
+Yearly updates of china.csv (and the regional feeds in the same layout)
+only ever add rows at the end. ``read_appended`` checks that the first
+``size`` bytes of the file are still exactly the ones the frame was parsed
+from, by comparing their digest, and then parses only the bytes after them.
+The digest is the content fingerprint of ``analysis.columnar``, continued
+over the new bytes, so the returned digest also stamps the rewritten binary
+cache without another pass over the file.
+"""
+
+import io
+
+import pandas as pd
+
+from analysis import columnar, schema
+
+BLOCK = 1 << 20
+
+
+def digest_file(path):
+    """Size and content fingerprint (see ``analysis.columnar``) of the file's bytes."""
+    hasher = columnar.hasher()
+    size = 0
+    with open(path, "rb") as source:
+        for block in iter(lambda: source.read(BLOCK), b""):
+            hasher.update(block)
+            size += len(block)
+    return size, hasher.hexdigest()
+
+
+def read_appended(path, frame, size, digest):
+    """``frame`` extended with the rows appended to ``path`` since it was ``size`` bytes long.
+
+    Returns ``(frame, new_size, new_digest)``, or None when the file is not
+    the old content followed by complete new lines, in which case it has to
+    be parsed from scratch.
+    """
+    hasher = columnar.hasher()
+    last = b""
+
+    with open(path, "rb") as source:
+        remaining = size
+        while remaining:
+            block = source.read(min(BLOCK, remaining))
+            if not block:
+                return None
+            hasher.update(block)
+            remaining -= len(block)
+            last = block[-1:]
+
+        if hasher.hexdigest() != digest or (size and last != b"\n"):
+            return None
+
+        tail = source.read()
+
+    hasher.update(tail)
+    new_size, new_digest = size + len(tail), hasher.hexdigest()
+    if not tail.strip():
+        return frame, new_size, new_digest
+
+    rows = pd.read_csv(io.BytesIO(tail), header=None, names=list(frame.columns), **schema.read_options())
+    rows = schema.finalize(rows)
+    rows.index = pd.RangeIndex(len(frame), len(frame) + len(rows))
+    return pd.concat([frame, rows]), new_size, new_digest
@@ -0,0 +1,131 @@
+"""Process-wide loader for the cleaned china.csv frame.
+
+Streamlit re-executes every page script on each widget interaction, so the
+pages must not parse the CSV themselves. ``load_data`` builds the cleaned
+frame (from the binary cache in ``analysis.columnar`` when it is current)
+once per server process and hands the same object to every rerun and
+every session until the file on disk changes or ``invalidate`` is called.
+The frame is frozen (see ``analysis.memory``): writing to it raises.
+Files of at least ``STREAMING_MIN`` bytes are ``streamed`` while their
+frame is not loaded: their summary statistics are then computed from the
+CSV in chunks rather than by loading it. Once the frame is in memory the
+statistics come from it, exactly and without parsing the text again.
+
+When the file changed only by growing at the end, the new rows are parsed
+on their own and appended to the cached frame (see ``analysis.ingest``).
+Such a frame keeps the *generation* of the one it extends; consumers that
+maintain running aggregates use ``load_versioned`` to tell an append (same
+generation, more rows) from a replacement (new generation).
+"""
+
+import functools
+import hashlib
+import os
+import itertools
+import threading
+from collections import namedtuple
+
+from analysis import columnar, ingest, memory, profiling
+from analysis.paths import resolve
+
+Entry = namedtuple("Entry", ["key", "data", "size", "digest", "generation"])
+
+STREAMING_MIN = int(os.environ.get("CHINA_STREAMING_MIN", 512 * 1024 * 1024))
+
+_cache = {}
+_lock = threading.Lock()
+_generations = itertools.count(1)
+
+
+def fingerprint(path=None):
+    """Cheap identity of the file on disk: path, mtime and size hashed together."""
+    path = resolve(path)
+    stat = os.stat(path)
+    key = f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def _append(path, key, entry):
+    appended = ingest.read_appended(path, entry.data, entry.size, entry.digest)
+    if appended is None:
+        return None
+
+    data, size, digest = appended
+    if len(data) > len(entry.data):
+        try:
+            columnar.write(data, path, digest)
+        except OSError:
+            pass
+    return Entry(key, memory.freeze(data), size, digest, entry.generation)
+
+
+def _load(path, key):
+    size, digest = ingest.digest_file(path)
+    data = memory.freeze(columnar.load(path, digest))
+    return Entry(key, data, size, digest, next(_generations))
+
+
+def load_versioned(path=None):
+    """The cleaned frame for ``path`` and its generation number.
+
+    The generation changes whenever the frame is rebuilt from scratch; a
+    frame with the same generation as an earlier one starts with exactly
+    the rows of that earlier frame.
+    """
+    path = resolve(path)
+
+    with profiling.stage("load", path.name), _lock:
+        key = fingerprint(path)
+        entry = _cache.get(path)
+        if entry is not None and entry.key == key:
+            return entry.data, entry.generation
+
+        updated = _append(path, key, entry) if entry is not None else None
+        entry = updated or _load(path, key)
+        _cache[path] = entry
+        return entry.data, entry.generation
+
+
+def load_data(path=None):
+    """Return the cleaned frame for ``path`` (china.csv by default).
+
+    The result is shared between callers; its arrays are read-only.
+    """
+    return load_versioned(path)[0]
+
+
+def export_csv(path=None):
+    """The cleaned frame as CSV bytes, for full-resolution downloads."""
+    path = resolve(path)
+    return _export_csv(path, fingerprint(path))
+
+
+@functools.lru_cache(maxsize=4)
+def _export_csv(path, key):
+    return load_data(path).to_csv(index=False).encode()
+
+
+def loaded(path=None):
+    """Whether the frame of the current version of ``path`` is already in memory."""
+    path = resolve(path)
+    with _lock:
+        entry = _cache.get(path)
+    return entry is not None and entry.key == fingerprint(path)
+
+
+def streamed(path=None):
+    """Whether statistics of ``path`` should be computed by streaming it instead of loading it."""
+    return os.path.getsize(resolve(path)) >= STREAMING_MIN and not loaded(path)
+
+
+def invalidate(path=None):
+    """Drop the cached frame for ``path``, or every cached frame when omitted.
+
+    Call this after replacing the CSV in place with identical mtime and size,
+    which the fingerprint cannot detect on its own.
+    """
+    with _lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(resolve(path), None)
@@ -0,0 +1,148 @@
+"""Read-only shared frames and accounting of where the process memory goes.
+
+The cleaned dataset and everything derived from it are built once per
+server process and handed to every session (see ``analysis.loader``).
+``freeze`` guards such a frame against accidental writes from a page, which
+would otherwise change the data for every viewer: the arrays behind it are
+made read-only, so in-place writes (``data.loc[...] = ...``) raise, and the
+frame becomes a ``SharedFrame``, which refuses to add, replace or remove
+columns, to relabel, and to run ``inplace=True`` methods. Anything computed
+from a shared frame is an ordinary, writable frame; call ``.copy()`` to get
+a writable copy of the data itself.
+
+``shared_usage`` reports the memory held once per process, counting every
+array buffer once however many cached frames reference it, and
+``session_usage`` the memory held per Streamlit session. ``panel`` shows
+both in the sidebar of a profiled run (see ``analysis.profiling``).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+class SharedFrame(pd.DataFrame):
+    """A DataFrame whose columns, labels and rows cannot be changed in place."""
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame
+
+    def _refuse(self, *args, **kwargs):
+        raise TypeError("shared frames are read-only; work on a .copy() of them")
+
+    # ``inplace=True`` methods go through ``_update_inplace``, label setters through ``_set_axis``.
+    __setitem__ = __delitem__ = insert = pop = _update_inplace = _set_axis = _refuse
+
+    def copy(self, deep=True):
+        return pd.DataFrame(self).copy(deep=deep)
+
+
+def _arrays(frame):
+    # Blocks are a pandas internal, but the only way to reach the arrays
+    # themselves rather than copies of them.
+    for block in frame._mgr.blocks:
+        values = block.values
+        if isinstance(values, np.ndarray):
+            yield values
+        else:
+            for name in ("_data", "_mask", "_ndarray", "_codes"):
+                array = getattr(values, name, None)
+                if isinstance(array, np.ndarray):
+                    yield array
+
+
+def freeze(frame):
+    """Read-only ``SharedFrame`` over the arrays of ``frame``.
+
+    A frame with several blocks of one dtype is consolidated first, which
+    copies those blocks; the arrays of an already consolidated frame are
+    frozen in place.
+    """
+    # Consolidation replaces blocks with new, writable arrays: do it before freezing.
+    frame._consolidate_inplace()
+    for array in _arrays(frame):
+        array.flags.writeable = False
+    return SharedFrame(frame)
+
+
+def is_frozen(frame):
+    return all(not array.flags.writeable for array in _arrays(frame))
+
+
+def _buffers(frame, seen):
+    total = 0
+    for array in _arrays(frame):
+        base = array
+        while isinstance(base.base, np.ndarray):
+            base = base.base
+        address = base.__array_interface__["data"][0]
+        if address not in seen:
+            seen.add(address)
+            total += base.nbytes
+    # Index and column labels are small next to the data; count them as they are.
+    return total + frame.index.memory_usage(deep=True)
+
+
+def shared_usage():
+    """Bytes held once per process, per store, as a list of row dicts."""
+    from analysis import derived, figures, loader
+
+    seen = set()
+    frames = [entry.data for entry in list(loader._cache.values())]
+    combined = [entry[3] for entry in list(derived._store.values())]
+
+    rows = [
+        {"store": "cleaned dataset", "entries": len(frames), "bytes": sum(_buffers(frame, seen) for frame in frames)},
+        {"store": "derived columns", "entries": len(combined), "bytes": sum(_buffers(frame, seen) for frame in combined)},
+        {"store": "figure cache", "entries": figures.info()["entries"], "bytes": figures.info()["bytes"]},
+    ]
+    return rows
+
+
+def session_usage():
+    """Bytes of session state per active Streamlit session; empty outside a server."""
+    from streamlit import runtime
+    from streamlit.vendor.pympler.asizeof import asizeof
+
+    if not runtime.exists():
+        return []
+
+    # The session manager is private; the public stats only give the total.
+    manager = getattr(runtime.get_instance(), "_session_mgr", None)
+    if manager is None:
+        return []
+
+    return [
+        {"session": info.session.id[:8], "bytes": asizeof(info.session.session_state)}
+        for info in manager.list_active_sessions()
+    ]
+
+
+def process_rss():
+    """Current resident set size of the process in bytes, or None where /proc is missing."""
+    try:
+        with open("/proc/self/statm") as statm:
+            pages = int(statm.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def panel():
+    """Sidebar tables of the shared store and per-session memory."""
+    import streamlit as st
+
+    shared = pd.DataFrame(shared_usage())
+    sessions = pd.DataFrame(session_usage(), columns=["session", "bytes"])
+    rss = process_rss()
+
+    with st.sidebar.expander("Memory", expanded=False):
+        caption = f"Shared store: {shared['bytes'].sum() / 2 ** 20:.1f} MiB"
+        if rss is not None:
+            caption += f", process RSS: {rss / 2 ** 20:.1f} MiB"
+        caption += f", {len(sessions)} sessions holding {sessions['bytes'].sum() / 2 ** 10:.1f} KiB"
+        st.caption(caption)
+        st.dataframe(shared.assign(MiB=shared["bytes"] / 2 ** 20), hide_index=True)
+        st.dataframe(sessions.assign(KiB=sessions["bytes"] / 2 ** 10), hide_index=True)
@@ -0,0 +1,19 @@
+"""Locations of the dataset and helpers to resolve user-supplied paths.
+
+The pages read china.csv from the repository root unless the ``CHINA_DATASET``
+environment variable points to another file with the same layout.
+"""
+
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_PATH = Path(os.environ.get("CHINA_DATASET", ROOT / "china.csv"))
+
+
+def resolve(path=None):
+    """Absolute path of ``path``, relative paths being taken from the repository root."""
+    path = Path(path) if path is not None else DATA_PATH
+    if not path.is_absolute():
+        path = ROOT / path
+    return path.resolve()
@@ -0,0 +1,153 @@
+"""Bucketing of the dataset into year periods and per-period statistics.
+
+A period split is described by its breakpoints: the first year of every
+period plus one past the last year, e.g. ``(1950, 1981, 2000, 2023)`` for
+1950-1980, 1981-1999 and 2000-2022. The frame is bucketed once with
+``pd.cut`` and every requested statistic of every column is computed in a
+single ``groupby().agg`` pass. Results for the loaded dataset are memoized
+per (dataset fingerprint, breakpoints, statistics, year range) so switching
+back and forth between period splits in the UI is a lookup. After an append
+to the dataset, the statistics ``analysis.running`` supports are updated per
+period from the new rows alone instead of regrouping the whole history.
+``stream_aggregate`` computes the same table from the CSV in chunks with
+sketched medians, for files too large to load; the memoized statistics of
+files the loader considers ``streamed`` come from it.
+"""
+
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from analysis import memory, profiling, running, schema, sketch, years as year_range
+from analysis.loader import fingerprint, load_versioned, streamed
+from analysis.paths import resolve
+
+DEFAULT_BREAKPOINTS = (1950, 1981, 2000, 2023)
+DEFAULT_STATS = ("mean", "median")
+
+_running = {}
+_running_lock = threading.Lock()
+
+
+def labels(breakpoints):
+    return [f"{start}-{end - 1}" for start, end in zip(breakpoints, breakpoints[1:])]
+
+
+def assign(data, breakpoints=DEFAULT_BREAKPOINTS):
+    """Ordered categorical of period labels, one per row of ``data``.
+
+    Years outside the breakpoints get a missing label.
+    """
+    return pd.cut(data["Year"], bins=list(breakpoints), right=False, labels=labels(breakpoints))
+
+
+def aggregate(data, breakpoints=DEFAULT_BREAKPOINTS, stats=DEFAULT_STATS, columns=None):
+    """Statistics of ``columns`` (all numeric columns but Year by default) per period.
+
+    Returns a frame indexed by period label with ``(column, statistic)``
+    columns. Missing values are skipped, so the Null urban/rural years do not
+    drag the period means down.
+    """
+    if columns is None:
+        columns = _numeric_columns(data)
+
+    grouped = data[list(columns)].groupby(assign(data, breakpoints), observed=False)
+    table = grouped.agg(list(stats))
+    table.index.name = "Period"
+    return table
+
+
+def _numeric_columns(data):
+    return [name for name in data.select_dtypes("number").columns if name != "Year"]
+
+
+def _absorb(states, rows, breakpoints, columns):
+    periods = assign(rows, breakpoints)
+    block = rows[columns].to_numpy(dtype="float64", na_value=np.nan)
+    for period, state in states.items():
+        state.update(block[(periods == period).to_numpy()])
+
+
+def _from_running(states, breakpoints, stats, columns):
+    names = labels(breakpoints)
+    values = np.column_stack([
+        np.array([states[period].result(stat, ddof=1) for period in names])
+        for stat in stats
+    ]) if names else np.empty((0, 0))
+    # (period, stat, column) -> (period, column, stat), the order groupby().agg produces.
+    values = values.reshape(len(names), len(stats), len(columns)).transpose(0, 2, 1)
+    return pd.DataFrame(
+        values.reshape(len(names), -1),
+        index=pd.CategoricalIndex(names, categories=names, ordered=True, name="Period"),
+        columns=pd.MultiIndex.from_product([columns, list(stats)]),
+    )
+
+
+def with_periods(data, breakpoints=DEFAULT_BREAKPOINTS):
+    """``data`` plus a ``Period`` column, restricted to the years the breakpoints cover."""
+    frame = data.assign(Period=assign(data, breakpoints))
+    return frame[frame["Period"].notna()]
+
+
+def melt(table, stat, names, var_name, value_name):
+    """Long format of one statistic of ``table`` for charting.
+
+    ``names`` maps column names of the dataset to the labels shown in charts.
+    """
+    wide = table.xs(stat, axis=1, level=1)[list(names)].rename(columns=names)
+    return wide.reset_index().melt(id_vars="Period", var_name=var_name, value_name=value_name)
+
+
+def stream_aggregate(path=None, breakpoints=DEFAULT_BREAKPOINTS, stats=DEFAULT_STATS, columns=None,
+                     accuracy=sketch.DEFAULT_K, chunk_rows=schema.CHUNK_ROWS):
+    """``aggregate`` of a CSV read ``chunk_rows`` rows at a time, never holding all of it.
+
+    Only the statistics ``analysis.running`` supports are available. Medians
+    come from KLL sketches with ``k = accuracy`` (see ``analysis.sketch``);
+    the other statistics are exact.
+    """
+    unsupported = set(stats) - set(running.SUPPORTED)
+    if unsupported:
+        raise ValueError(f"statistics not available when streaming: {', '.join(sorted(unsupported))}")
+    if columns is None:
+        columns = [name for name in schema.COLUMNS if name != "Year"]
+    columns = list(columns)
+
+    states = {period: running.RunningStatistics(len(columns), accuracy) for period in labels(breakpoints)}
+    for chunk in schema.read_chunks(resolve(path), chunk_rows):
+        _absorb(states, chunk, breakpoints, columns)
+    return _from_running(states, breakpoints, stats, columns)
+
+
+def period_statistics(breakpoints=DEFAULT_BREAKPOINTS, stats=DEFAULT_STATS, path=None, years=None):
+    """``aggregate`` over the loaded dataset, memoized. The result is shared and read-only.
+
+    ``years`` restricts the rows to an inclusive (first, last) range; such
+    results are aggregated directly rather than kept up to date on append.
+    """
+    path = resolve(path)
+    stream = years is None and set(stats) <= set(running.SUPPORTED) and streamed(path)
+    return _period_statistics(path, fingerprint(path), tuple(breakpoints), tuple(stats), years, stream)
+
+
+@functools.lru_cache(maxsize=64)
+def _period_statistics(path, key, breakpoints, stats, years, stream):
+    if stream:
+        with profiling.stage("aggregate", "streamed period statistics"):
+            return memory.freeze(stream_aggregate(path, breakpoints, stats))
+
+    data, generation = load_versioned(path)
+    if years is not None or not set(stats) <= set(running.SUPPORTED):
+        with profiling.stage("aggregate", "period statistics"):
+            return memory.freeze(aggregate(year_range.select(data, years), breakpoints, stats))
+
+    columns = _numeric_columns(data)
+    with profiling.stage("aggregate", "period statistics"), _running_lock:
+        states = running.follow(
+            _running, (path, breakpoints), data, generation,
+            start=lambda: {period: running.RunningStatistics(len(columns)) for period in labels(breakpoints)},
+            absorb=lambda states, rows: _absorb(states, rows, breakpoints, columns),
+        )
+        return memory.freeze(_from_running(states, breakpoints, stats, columns))
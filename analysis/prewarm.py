@@ -0,0 +1,113 @@
+"""Pre-warming of a server process before its first request.
+
+``prewarm`` imports the plotting stack, loads the dataset, computes the
+aggregates every page needs and builds the figures of the sections each
+page opens on, timing every step. ``start_background`` runs it once per
+process in a daemon thread; the landing page calls it so that the analysis
+pages are warm by the time a visitor opens them.
+
+To warm up before the server accepts connections, start Streamlit through
+this module instead of ``streamlit run``::
+
+    python -m analysis.prewarm --serve [streamlit run options]
+
+Without ``--serve`` it only reports the timings, which is a quick way to
+check the import cost of the stack.
+"""
+
+import importlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+HEAVY_MODULES = ("pandas", "pyarrow", "plotly.graph_objects", "plotly.express")
+
+_started = False
+_lock = threading.Lock()
+
+
+def _timed(timings, name, function, *args, **kwargs):
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    timings[name] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+def prewarm(path=None):
+    """Warm the process-wide caches for ``path``; returns step timings in milliseconds."""
+    timings = {}
+
+    for module in HEAVY_MODULES:
+        _timed(timings, f"import {module}", importlib.import_module, module)
+
+    from analysis import charts, periods
+    from analysis.describe import SUMMARY_LABELS, dataset_statistics
+    from analysis.downsample import DEFAULT_BUDGET
+    from analysis.figures import get_figure
+    from analysis.loader import load_data
+
+    _timed(timings, "load dataset", load_data, path)
+    _timed(timings, "descriptive statistics", dataset_statistics, tuple(SUMMARY_LABELS), path=path)
+    _timed(timings, "period statistics", periods.period_statistics, periods.DEFAULT_BREAKPOINTS, path=path)
+
+    figures = [
+        (charts.population_bar, {}),
+        (charts.population_density_line, {"budget": DEFAULT_BUDGET}),
+        (charts.life_expectancy_line, {"breakpoints": periods.DEFAULT_BREAKPOINTS, "budget": DEFAULT_BUDGET}),
+    ]
+    for builder, params in figures:
+        _timed(timings, f"figure {builder.__name__}", get_figure, builder, path, **params)
+
+    logger.info("prewarm timings (ms): %s", timings)
+    return timings
+
+
+def start_background(path=None):
+    """Run ``prewarm`` in a daemon thread, at most once per process."""
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+
+    def run():
+        try:
+            prewarm(path)
+        except Exception:
+            logger.exception("prewarm failed")
+
+    threading.Thread(target=run, name="prewarm", daemon=True).start()
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    serve = "--serve" in argv
+    if serve:
+        argv.remove("--serve")
+
+    total = time.perf_counter()
+    timings = prewarm()
+    for name, milliseconds in timings.items():
+        print(f"{name:>40}: {milliseconds:8.1f} ms")
+    print(f"{'total':>40}: {(time.perf_counter() - total) * 1000:8.1f} ms")
+
+    if serve:
+        # Under ``python -m`` this file runs as __main__; the pages import the
+        # package copy of the module, which must not warm up a second time.
+        from streamlit.web import cli
+
+        from analysis import prewarm as imported
+        from analysis.paths import ROOT
+
+        imported._started = True
+        sys.argv = ["streamlit", "run", str(ROOT / "Main_page.py"), *argv]
+        return cli.main()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Per-stage timing of a page run.
+
+Profiling is off unless the ``CHINA_PROFILE`` environment variable is set to
+a true value or the page URL carries a ``profile`` query parameter (e.g.
+``?profile=1``). When on, every ``stage`` entered during the current script
+run records its wall time and the change in traced Python memory; the page
+shows the records in a sidebar panel and each stage is logged as one JSON
+line on the ``analysis.profiling`` logger.
+
+The library modules wrap their expensive steps in ``stage`` themselves:
+``load`` (loader), ``clean`` (text parsing), ``aggregate`` (period and
+descriptive statistics), ``figure-build`` (figure cache misses) and
+``render`` (sending a figure to the browser). Outside a profiled run
+``stage`` costs one attribute lookup. The panel also includes the memory
+report of ``analysis.memory``.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+_run = threading.local()
+
+
+def _requested():
+    if os.environ.get("CHINA_PROFILE", "").lower() in ("1", "true", "yes", "on"):
+        return True
+
+    import streamlit as st
+
+    return "profile" in st.query_params
+
+
+def begin():
+    """Start recording stages for the current script run if profiling is requested."""
+    _run.records = None
+    if not _requested():
+        return
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _run.records = []
+    _run.started = time.perf_counter()
+
+
+def enabled():
+    return getattr(_run, "records", None) is not None
+
+
+@contextmanager
+def stage(name, label=""):
+    records = getattr(_run, "records", None)
+    if records is None:
+        yield
+        return
+
+    memory = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record = {
+            "stage": name,
+            "label": label,
+            "start_ms": round((started - _run.started) * 1000, 2),
+            "wall_ms": round((time.perf_counter() - started) * 1000, 2),
+            "memory_delta_kb": round((tracemalloc.get_traced_memory()[0] - memory) / 1024, 1),
+        }
+        records.append(record)
+        logger.info(json.dumps(record))
+
+
+def records():
+    return list(getattr(_run, "records", None) or [])
+
+
+def panel():
+    """Sidebar table of the stages recorded in this run; does nothing when profiling is off."""
+    if not enabled():
+        return
+
+    import pandas as pd
+    import streamlit as st
+
+    rows = records()
+    total = (time.perf_counter() - _run.started) * 1000
+
+    with st.sidebar.expander("Profiling", expanded=True):
+        st.caption(f"Script run: {total:.1f} ms, {len(rows)} stages")
+        if rows:
+            frame = pd.DataFrame(rows)
+            st.dataframe(frame.groupby("stage", sort=False)[["wall_ms", "memory_delta_kb"]].sum())
+            st.dataframe(frame, hide_index=True)
+
+    from analysis import memory
+
+    memory.panel()
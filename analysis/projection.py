@@ -0,0 +1,135 @@
+"""Scenario projections of the population beyond the last year of data.
+
+Every scenario is one future path of the fertility, death and net
+migration rates, from which the birth rate and the population follow:
+
+- fertility moves linearly from its last observed value to a target in the
+  final year, and a sweep over several targets gives the scenario groups;
+- all three rates also follow a random walk whose yearly steps have the
+  spread of the last ``history`` years of observed changes, and the death
+  rate keeps the average drift of those years;
+- the birth rate scales with fertility, and the population grows each year
+  by (births - deaths + net migration) per thousand.
+
+All scenarios of a batch are simulated at once as (scenarios, years)
+arrays: the random walks are cumulative sums of a normal matrix and the
+population is a cumulative product, with no loop over scenarios or years.
+Batches are seeded from ``np.random.SeedSequence`` children and go to the
+``analysis.workers`` process pool for very large sweeps. Fan quantiles are
+memoized on the input series and the parameters.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from analysis import workers
+
+Projection = namedtuple("Projection", ["years", "bands"])
+
+COLUMNS = ("Population", "Fertility Rate", "Birth Rate", "Death Rate", "Net Migration Rate")
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+HORIZON = 2100
+TARGETS = (1.0, 1.3, 1.6, 1.9, 2.1)
+PATHS = 1000
+HISTORY = 20
+SEED = 2023
+BATCH = 1000
+# Scenario-years below this run in the calling process.
+PARALLEL_MIN = 5_000_000
+MAX_RESULTS = 16
+
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+def inputs(data, history=HISTORY):
+    """Last observed values and the yearly drift and spread of the rates in the last ``history`` years."""
+    recent = data[["Population", "Birth Rate", "Death Rate", "Net Migration Rate", "Fertility Rate"]].tail(history + 1)
+    recent = recent.to_numpy(dtype="float64", na_value=np.nan)
+    steps = np.diff(recent[:, 1:], axis=0)
+    return {
+        "year": int(data["Year"].iloc[-1]),
+        "last": recent[-1],
+        "drift": np.nanmean(steps, axis=0),
+        "spread": np.nanstd(steps, axis=0),
+    }
+
+
+def _simulate(start, target, length, seed, size):
+    """``size`` paths per target; returns (len(COLUMNS), scenarios, length) float32 values."""
+    population, birth, death, migration, fertility = start["last"]
+    _, drift_death, _, _ = start["drift"]
+    spread_birth, spread_death, spread_migration, spread_fertility = start["spread"]
+
+    rng = np.random.default_rng(seed)
+    targets = np.repeat(np.asarray(target, dtype="float64"), size)[:, None]
+    steps = np.arange(1, length + 1)
+    shape = (len(targets), length)
+
+    walk = lambda spread: np.cumsum(rng.normal(0.0, spread, shape), axis=1)
+    fertility_path = np.maximum(fertility + (targets - fertility) * steps / length + walk(spread_fertility), 0.3)
+    death_path = np.clip(death + drift_death * steps + walk(spread_death), 1.0, 40.0)
+    migration_path = migration + walk(spread_migration)
+    birth_path = np.maximum(birth * fertility_path / fertility, 0.0)
+
+    growth = 1 + (birth_path - death_path + migration_path) / 1000
+    population_path = population * np.cumprod(growth, axis=1)
+
+    return np.stack([population_path, fertility_path, birth_path, death_path, migration_path]).astype("float32")
+
+
+def simulate(data, horizon=HORIZON, targets=TARGETS, paths=PATHS, seed=SEED, history=HISTORY):
+    """Every scenario: ``paths`` stochastic paths for each fertility target.
+
+    Returns the projected years and a (len(COLUMNS), scenarios, years) array.
+    """
+    start = inputs(data, history)
+    length = horizon - start["year"]
+    if length < 1:
+        raise ValueError(f"horizon {horizon} is not after the last year of data ({start['year']})")
+
+    sizes = [BATCH] * (paths // BATCH) + ([paths % BATCH] if paths % BATCH else [])
+    seeds = iter(np.random.SeedSequence(seed).spawn(len(sizes) * len(targets)))
+    jobs = [(start, target, length, next(seeds), size) for target in targets for size in sizes]
+
+    parallel = paths * len(targets) * length >= PARALLEL_MIN
+    values = np.concatenate(workers.map_batches(_simulate, jobs, parallel), axis=1)
+    return np.arange(start["year"] + 1, horizon + 1), values
+
+
+def _key(data, params):
+    digest = hashlib.sha1()
+    for column in ("Year", *COLUMNS):
+        digest.update(data[column].to_numpy(dtype="float64", na_value=np.nan).tobytes())
+    digest.update(repr(params).encode())
+    return digest.hexdigest()
+
+
+def project(data, horizon=HORIZON, targets=TARGETS, paths=PATHS, seed=SEED, history=HISTORY):
+    """``QUANTILES`` of every column across the scenarios, year by year, memoized.
+
+    Returns a ``Projection`` whose ``bands`` map each of ``COLUMNS`` to a
+    (len(QUANTILES), years) array. The result is shared and read-only.
+    """
+    targets = tuple(float(target) for target in targets)
+    key = _key(data, (horizon, targets, paths, seed, history))
+
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+
+    years, values = simulate(data, horizon, targets, paths, seed, history)
+    levels = np.quantile(values, QUANTILES, axis=1)
+    years.flags.writeable = levels.flags.writeable = False
+    result = Projection(years, {column: levels[:, index] for index, column in enumerate(COLUMNS)})
+
+    with _lock:
+        _results[key] = result
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+
+    return result
@@ -0,0 +1,160 @@
+"""Registry of country datasets in the china.csv layout and their combined frame.
+
+Every CSV in ``DIRECTORY`` whose header is the china.csv header is a
+dataset; the country is named after the file (``south_korea.csv`` is
+"South Korea"). The directory is the one holding china.csv unless the
+``CHINA_DATASETS`` environment variable points elsewhere.
+
+``load_countries`` parses the selected files, one job per file, in the
+process pool of ``analysis.workers`` once there is enough text to pay for
+the workers; every job goes through ``analysis.columnar``, so a file with an
+up-to-date binary cache is memory-mapped instead of parsed, and computes the
+derived columns of its own country. The frames are then concatenated once
+into a single long frame with a categorical ``Country`` column (one byte
+per row), so load time and memory grow linearly with the number and size
+of the files. Results are memoized per selection and file fingerprints,
+and ``discover`` keeps the headers it read until a CSV in the directory
+changes.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analysis import columnar, derived, memory, profiling, schema, workers
+from analysis.loader import fingerprint as file_fingerprint
+from analysis.paths import DATA_PATH, resolve
+
+DIRECTORY = Path(os.environ.get("CHINA_DATASETS", DATA_PATH.parent))
+# Bytes of CSV below which the files are parsed in the calling process.
+PARALLEL_MIN = 32 * 1024 * 1024
+MAX_SELECTIONS = 8
+
+_combined = OrderedDict()
+_discovered = {}
+_lock = threading.Lock()
+
+
+def country_name(path):
+    return Path(path).stem.replace("_", " ").title()
+
+
+def _listing(directory):
+    """Name, mtime and size of every CSV in ``directory``."""
+    listing = []
+    for path in sorted(directory.glob("*.csv")):
+        try:
+            status = path.stat()
+        except OSError:
+            continue
+        listing.append((path.name, status.st_mtime_ns, status.st_size))
+    return tuple(listing)
+
+
+def discover(directory=None):
+    """Country names mapped to dataset paths, in alphabetical order.
+
+    Headers are only read again when a CSV in the directory is added,
+    removed or modified.
+    """
+    directory = resolve(directory or DIRECTORY)
+    listing = _listing(directory)
+    with _lock:
+        entry = _discovered.get(directory)
+    if entry is not None and entry[0] == listing:
+        return dict(entry[1])
+
+    found = {}
+    for name, _, _ in listing:
+        path = directory / name
+        try:
+            header = list(pd.read_csv(path, nrows=0).columns)
+        except (OSError, ValueError):
+            continue
+        if header == list(schema.COLUMNS):
+            found[country_name(path)] = path
+    found = dict(sorted(found.items()))
+
+    with _lock:
+        _discovered[directory] = (listing, found)
+    return dict(found)
+
+
+def datasets(countries=None, directory=None):
+    """(country, path) pairs of ``countries`` (every registered country by default)."""
+    available = discover(directory)
+    if countries is None:
+        return tuple(available.items())
+
+    unknown = [name for name in countries if name not in available]
+    if unknown:
+        raise ValueError(f"unknown countries: {', '.join(unknown)}")
+    return tuple((name, available[name]) for name in countries)
+
+
+def fingerprint(countries=None, directory=None):
+    """Identity of the selected files on disk, from their path, mtime and size."""
+    digest = hashlib.sha1()
+    for name, path in datasets(countries, directory):
+        digest.update(f"{name}:{file_fingerprint(path)}".encode())
+    return digest.hexdigest()
+
+
+def _read(path):
+    base = columnar.load(path)
+    return pd.concat([base, derived.compute(base)], axis=1)
+
+
+def combine(frames, names):
+    """One long frame of per-country ``frames``, with a leading categorical ``Country`` column."""
+    lengths = [len(frame) for frame in frames]
+    codes = np.repeat(np.arange(len(names)), lengths)
+    country = pd.Categorical.from_codes(codes, categories=list(names))
+
+    if frames:
+        combined = pd.concat(frames, ignore_index=True)
+    else:
+        combined = pd.DataFrame(columns=list(schema.COLUMNS))
+    combined.insert(0, "Country", country)
+    return combined
+
+
+def load_countries(countries=None, directory=None, mode=None):
+    """Long frame of the selected countries, in the order given. Shared and read-only.
+
+    ``mode`` is one of ``analysis.workers.MODES``; by default the files are
+    parsed in worker processes once together they hold ``PARALLEL_MIN``
+    bytes and serially otherwise.
+    """
+    selection = datasets(countries, directory)
+    key = tuple((name, str(path), file_fingerprint(path)) for name, path in selection)
+
+    with _lock:
+        if key in _combined:
+            _combined.move_to_end(key)
+            return _combined[key]
+
+    if mode is None:
+        size = sum(os.path.getsize(path) for _, path in selection)
+        mode = "process" if size >= PARALLEL_MIN and len(selection) > 1 else "serial"
+
+    with profiling.stage("load", f"{len(selection)} countries ({mode})"):
+        frames = workers.map_jobs(_read, [(path,) for _, path in selection], mode)
+        combined = memory.freeze(combine(frames, [name for name, _ in selection]))
+
+    with _lock:
+        _combined[key] = combined
+        while len(_combined) > MAX_SELECTIONS:
+            _combined.popitem(last=False)
+    return combined
+
+
+def clear():
+    with _lock:
+        _combined.clear()
+        _discovered.clear()
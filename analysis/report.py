@@ -0,0 +1,234 @@
+"""Static HTML export of every page section.
+
+Each section is rendered by running its page script headlessly with
+Streamlit's ``AppTest`` (sidebar controls at their defaults), picking the
+section, and converting the elements it produced: titles and text, tables,
+code, metrics and Plotly figures. Controls inside a section are written
+out as their current values, so the reader knows what the figures show.
+Sections are independent, so they are rendered concurrently in the
+``analysis.workers`` process pool, each worker building its own figures.
+
+An export directory holds ``index.html``, a single self-contained file with
+plotly.js inlined, plus the rendered section fragments and a manifest. A
+section is rendered again only when its fingerprint changed: the content
+of the dataset, the registered country files (``analysis.registry``), the
+source of its page and the source of this package.
+
+    python -m analysis.report [OUTPUT] [--force] [--serial]
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import sys
+import time
+
+from analysis import registry, workers
+from analysis.columnar import content_fingerprint
+from analysis.paths import DATA_PATH, ROOT
+
+PAGES = ("Main_page.py", "pages/Population_analysis.py", "pages/Fertility_rate_analysis.py", "pages/Country_comparison.py")
+OUTPUT = ROOT / "report"
+MANIFEST = "manifest.json"
+
+# Widgets driving section selection; they become report headings instead.
+_NAVIGATION = ("Select content to show", "Section")
+_WIDGETS = {
+    "button", "checkbox", "color_picker", "date_input", "download_button", "multiselect", "number_input",
+    "radio", "select_slider", "selectbox", "slider", "text_area", "text_input", "time_input", "toggle",
+}
+
+
+def _digest(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+    return digest.hexdigest()
+
+
+def fingerprint(page, data_fingerprint):
+    """Fingerprint of the sections of ``page``: dataset content plus page and package sources."""
+    sources = [(ROOT / page).read_bytes()]
+    sources += [module.read_bytes() for module in sorted((ROOT / "analysis").glob("*.py"))]
+    return _digest(data_fingerprint, *sources)
+
+
+def _app(page):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(ROOT / page), default_timeout=300)
+    app.run()
+    return app
+
+
+def sections(page):
+    """(branch, section) pairs of ``page``; either is None when the page has no such selector."""
+    app = _app(page)
+    branches = app.selectbox[0].options if app.selectbox and app.selectbox[0].label == _NAVIGATION[0] else [None]
+
+    found = []
+    for branch in branches:
+        if branch is not None:
+            app.selectbox[0].select(branch).run()
+        radios = [radio for radio in app.radio if radio.label == _NAVIGATION[1]]
+        found += [(branch, section) for section in (radios[0].options if radios else [None])]
+    return found
+
+
+def _element(element):
+    kind = element.type
+
+    if kind in ("title", "header", "subheader"):
+        level = {"title": 1, "header": 2, "subheader": 3}[kind]
+        return f"<h{level + 1}>{html.escape(element.value)}</h{level + 1}>"
+    if kind == "text":
+        return f"<p>{html.escape(element.value)}</p>"
+    if kind in ("markdown", "caption", "info", "success", "warning", "error"):
+        return f'<p class="{kind}">{html.escape(element.value)}</p>'
+    if kind == "code":
+        return f"<pre><code>{html.escape(element.value)}</code></pre>"
+    if kind == "arrow_data_frame":
+        return element.value.to_html(border=0, na_rep="", classes="table")
+    if kind == "metric":
+        return f'<div class="metric"><span>{html.escape(element.label)}</span><b>{html.escape(str(element.value))}</b></div>'
+    if kind == "plotly_chart":
+        spec = json.loads(element.proto.spec)
+        target = f"figure-{_digest(element.proto.spec)[:12]}"
+        payload = json.dumps({"data": spec.get("data", []), "layout": spec.get("layout", {})}).replace("</", "<\\/")
+        return f'<div class="figure" id="{target}"></div><script>Plotly.newPlot("{target}", {payload});</script>'
+
+    if kind in _WIDGETS:
+        if element.label in _NAVIGATION:
+            return ""
+        return f'<p class="control">{html.escape(element.label)}: {html.escape(str(element.value))}</p>'
+    return ""
+
+
+def _render(node, depth=0):
+    parts = []
+    for child in node.children.values():
+        if child.type == "title" and depth == 0:
+            continue
+        if hasattr(child, "children") and child.type not in _WIDGETS:
+            inner = "".join(_render(child, depth + 1))
+            if inner:
+                parts.append(f'<div class="{child.type}">{inner}</div>')
+        else:
+            parts.append(_element(child))
+    return parts
+
+
+def render_section(page, branch, section):
+    """HTML of one section of ``page`` with its sidebar controls at their defaults."""
+    from analysis import resampling
+
+    app = _app(page)
+    if branch is not None:
+        app.selectbox[0].select(branch).run()
+    if section is not None:
+        [radio for radio in app.radio if radio.label == _NAVIGATION[1]][0].set_value(section).run()
+    # Sections showing background results render a placeholder until they are done.
+    if resampling.wait():
+        app.run()
+
+    if app.exception:
+        raise RuntimeError(f"{page} {branch} {section}: {app.exception[0].value}")
+    return "".join(_render(app.main))
+
+
+def _title(page):
+    return page.rsplit("/", 1)[-1].removesuffix(".py").replace("_", " ").capitalize()
+
+
+def _slug(page, *parts):
+    parts = [_title(page), *(part for part in parts if part is not None)]
+    return "-".join(part.lower().replace(" ", "_").replace("/", "_") for part in parts)
+
+
+def _document(pages):
+    from plotly.offline import get_plotlyjs
+
+    navigation, body = [], []
+    for page, entries in pages:
+        body.append(f"<h1>{html.escape(_title(page))}</h1>")
+        for branch, section, content in entries:
+            heading = " / ".join(part for part in (branch, section) if part is not None)
+            anchor = _slug(page, branch, section)
+            if heading:
+                navigation.append(f'<li><a href="#{anchor}">{html.escape(_title(page))}: {html.escape(heading)}</a></li>')
+                body.append(f'<section id="{anchor}"><h2>{html.escape(heading)}</h2>{content}</section>')
+            else:
+                navigation.append(f'<li><a href="#{anchor}">{html.escape(_title(page))}</a></li>')
+                body.append(f'<section id="{anchor}">{content}</section>')
+
+    style = (
+        "body{font-family:sans-serif;max-width:1100px;margin:auto;padding:1em}"
+        ".table{border-collapse:collapse;font-size:0.85em;display:block;overflow:auto;max-height:400px}"
+        ".table td,.table th{padding:2px 8px;border-bottom:1px solid #ddd}"
+        ".horizontal{display:flex;gap:2em}.metric span{display:block;color:#666}"
+        ".control{color:#666;font-style:italic}.markdown,.info{white-space:pre-line}"
+    )
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>China population analysis</title>"
+        f"<style>{style}</style><script>{get_plotlyjs()}</script></head><body>"
+        f"<nav><ul>{''.join(navigation)}</ul></nav>{''.join(body)}</body></html>"
+    )
+
+
+def export(output=OUTPUT, force=False, parallel=True, path=None):
+    """Write the report to ``output``; returns the number of sections rendered and reused."""
+    output = ROOT / output
+    fragments = output / "sections"
+    fragments.mkdir(parents=True, exist_ok=True)
+
+    manifest_path = output / MANIFEST
+    manifest = {} if force or not manifest_path.exists() else json.loads(manifest_path.read_text())
+    data_fingerprint = _digest(content_fingerprint(path or DATA_PATH), registry.fingerprint())
+
+    plan, jobs = {}, []
+    for page in PAGES:
+        key = fingerprint(page, data_fingerprint)
+        previous = manifest.get(page, {})
+        if previous.get("fingerprint") == key and all((fragments / name).exists() for *_, name in previous["sections"]):
+            plan[page] = {"fingerprint": key, "sections": previous["sections"]}
+            continue
+
+        entries = [[branch, section, _slug(page, branch, section) + ".html"] for branch, section in sections(page)]
+        plan[page] = {"fingerprint": key, "sections": entries}
+        jobs += [(page, branch, section, name) for branch, section, name in entries]
+
+    rendered = workers.map_batches(render_section, [job[:3] for job in jobs], parallel and len(jobs) > 1)
+    for (*_, name), content in zip(jobs, rendered):
+        (fragments / name).write_text(content, encoding="utf-8")
+
+    pages = [
+        (page, [(branch, section, (fragments / name).read_text(encoding="utf-8")) for branch, section, name in plan[page]["sections"]])
+        for page in PAGES
+    ]
+    (output / "index.html").write_text(_document(pages), encoding="utf-8")
+    manifest_path.write_text(json.dumps(plan, indent=2))
+
+    total = sum(len(entry["sections"]) for entry in plan.values())
+    return len(jobs), total - len(jobs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export every page section to a static HTML report.")
+    parser.add_argument("output", nargs="?", default=str(OUTPUT), help="output directory (default: report/)")
+    parser.add_argument("--force", action="store_true", help="render every section even if it is up to date")
+    parser.add_argument("--serial", action="store_true", help="render sections in this process, one at a time")
+    arguments = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    rendered, reused = export(arguments.output, arguments.force, not arguments.serial)
+    print(f"{arguments.output}: {rendered} sections rendered, {reused} up to date "
+          f"in {time.perf_counter() - started:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run the imported module, so the workers can unpickle ``render_section``.
+    from analysis.report import main
+
+    sys.exit(main())
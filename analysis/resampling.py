@@ -0,0 +1,174 @@
+"""Bootstrap confidence intervals and permutation tests for correlations.
+
+Resamples are drawn in batches: a batch of ``BATCH`` resamples is one
+(batch, rows) index or permutation matrix, and the correlations of all of
+its rows come out of a few array reductions. Spearman ranks of bootstrap
+samples, which contain ties, are averaged with one ``bincount`` per batch
+instead of a sort per resample.
+
+Every batch gets its own child of ``np.random.SeedSequence(seed)``, so a
+result depends on the seed and the number of resamples only, not on how
+the batches are spread over workers. Large runs go to the process pool of
+``analysis.workers``; small ones, such as the 73 years of the bundled
+dataset, are cheaper to run in the calling process than to ship to one.
+
+``submit`` runs a test for the loaded dataset in the background and
+memoizes it per (dataset fingerprint, year range, columns, method,
+resamples, seed), so the pages can show a placeholder and never wait on a
+computation.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait as _wait_all
+
+import numpy as np
+
+from analysis import profiling, workers, years as year_range
+from analysis.derived import load_derived
+from analysis.loader import fingerprint
+from analysis.paths import resolve
+
+Result = namedtuple("Result", ["estimate", "low", "high", "p_value", "rows", "resamples"])
+
+METHODS = ("pearson", "spearman")
+BATCH = 1000
+RESAMPLES = 20000
+CONFIDENCE = 0.95
+SEED = 2023
+# Resample-row products below this run in the calling process.
+PARALLEL_MIN = 5_000_000
+MAX_RESULTS = 64
+
+_results = OrderedDict()
+_lock = threading.Lock()
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="resampling")
+
+
+def _codes(values):
+    """Dense codes of ``values`` in ascending order, and the number of distinct ones."""
+    unique, codes = np.unique(values, return_inverse=True)
+    return codes, len(unique)
+
+
+def _average_ranks(codes, distinct, samples):
+    """Average ranks (ties share the mean rank) of every row of ``codes[samples]``."""
+    batch = len(samples)
+    sampled = codes[samples]
+    counts = np.bincount((sampled + distinct * np.arange(batch)[:, None]).ravel(), minlength=batch * distinct)
+    counts = counts.reshape(batch, distinct)
+    below = np.cumsum(counts, axis=1) - counts
+    average = below + (counts + 1) / 2
+    return np.take_along_axis(average, sampled, axis=1)
+
+
+def _rowwise_pearson(x, y):
+    x = x - x.mean(axis=1, keepdims=True)
+    y = y - y.mean(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (x * y).sum(axis=1) / np.sqrt((x * x).sum(axis=1) * (y * y).sum(axis=1))
+
+
+def _ranks(values):
+    codes, distinct = _codes(values)
+    return _average_ranks(codes, distinct, np.arange(len(values))[None, :])[0]
+
+
+def estimate(x, y, method="pearson"):
+    """Correlation of two complete arrays."""
+    if method == "spearman":
+        x, y = _ranks(x), _ranks(y)
+    return _rowwise_pearson(np.asarray(x, dtype="float64")[None, :], np.asarray(y, dtype="float64")[None, :])[0]
+
+
+def _bootstrap_batch(x, y, method, seed, size):
+    rng = np.random.default_rng(seed)
+    samples = rng.integers(0, len(x), size=(size, len(x)))
+    if method == "spearman":
+        return _rowwise_pearson(_average_ranks(*_codes(x), samples), _average_ranks(*_codes(y), samples))
+    return _rowwise_pearson(x[samples], y[samples])
+
+
+def _permutation_batch(x, y, method, seed, size):
+    rng = np.random.default_rng(seed)
+    if method == "spearman":
+        # Ranks are invariant under permutation: rank once, permute the ranks.
+        x, y = _ranks(x), _ranks(y)
+    shuffled = rng.permuted(np.broadcast_to(y, (size, len(y))), axis=1)
+    return _rowwise_pearson(np.broadcast_to(x, shuffled.shape), shuffled)
+
+
+def _run(function, x, y, method, resamples, seed):
+    sizes = [BATCH] * (resamples // BATCH) + ([resamples % BATCH] if resamples % BATCH else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(x, y, method, child, size) for child, size in zip(seeds, sizes)]
+    return np.concatenate(workers.map_batches(function, jobs, resamples * len(x) >= PARALLEL_MIN))
+
+
+def test(x, y, method="pearson", resamples=RESAMPLES, seed=SEED, confidence=CONFIDENCE):
+    """Bootstrap percentile interval and two-sided permutation p-value of the correlation.
+
+    Pairs with a missing value are dropped. The p-value counts the observed
+    arrangement among the permutations, so it is never zero. With fewer than
+    three pairs, or when the correlation is undefined, everything but the
+    counts is NaN.
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown correlation method: {method}")
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    present = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[present], y[present]
+
+    # Fewer than three pairs, or a constant column, leave nothing to resample.
+    observed = estimate(x, y, method) if len(x) >= 3 else np.nan
+    if np.isnan(observed):
+        return Result(np.nan, np.nan, np.nan, np.nan, len(x), resamples)
+
+    bootstrap = _run(_bootstrap_batch, x, y, method, resamples, (seed, 0))
+    permuted = _run(_permutation_batch, x, y, method, resamples, (seed, 1))
+
+    tail = (1 - confidence) / 2
+    low, high = np.nanquantile(bootstrap, [tail, 1 - tail])
+    extreme = np.count_nonzero(np.abs(permuted) >= abs(observed) - 1e-12)
+    return Result(observed, low, high, (extreme + 1) / (resamples + 1), len(x), resamples)
+
+
+def _compute(path, years, first, second, method, resamples, seed):
+    data = year_range.select(load_derived(path), years)
+    with profiling.stage("aggregate", f"{method} resampling {first} / {second}"):
+        return test(
+            data[first].to_numpy(dtype="float64", na_value=np.nan),
+            data[second].to_numpy(dtype="float64", na_value=np.nan),
+            method, resamples, seed,
+        )
+
+
+def submit(first, second, method="pearson", resamples=RESAMPLES, seed=SEED, path=None, years=None):
+    """Future of ``test`` on two columns of the loaded dataset (derived columns included), memoized.
+
+    ``years`` restricts the rows to an inclusive (first, last) range. Tests
+    run one at a time on a background thread. A finished future holds the
+    shared ``Result``.
+    """
+    path = resolve(path)
+    key = (path, fingerprint(path), years, first, second, method, resamples, seed)
+
+    with _lock:
+        future = _results.get(key)
+        if future is None or (future.done() and future.exception() is not None):
+            future = _background.submit(_compute, path, years, first, second, method, resamples, seed)
+            _results[key] = future
+        _results.move_to_end(key)
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+        return future
+
+
+def wait(timeout=None):
+    """Block until every submitted test has finished; returns whether any was still running."""
+    with _lock:
+        running = [future for future in _results.values() if not future.done()]
+    _wait_all(running, timeout)
+    return bool(running)
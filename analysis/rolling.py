@@ -0,0 +1,109 @@
+"""Trailing-window statistics of a numeric series.
+
+Every statistic is computed for all windows at once in O(n): moving means
+and standard deviations from differences of cumulative sums, moving minima
+and maxima with the van Herk/Gil-Werman block scheme (prefix and suffix
+extrema of fixed blocks, combined pairwise), the moving median with pandas'
+skiplist-based rolling median and the exponentially weighted mean with
+pandas' single-pass recursion. Windows at the start of the series are
+partial, and missing values are skipped within a window.
+
+Results are memoized on the content of the series, the window and the
+statistic, so moving a window slider back to a size already shown, or
+adding another statistic at the same size, does not recompute anything.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+STATS = ("mean", "median", "std", "min", "max", "ewm")
+MAX_RESULTS = 256
+
+_results = OrderedDict()
+_lock = threading.Lock()
+
+
+def _key(values, window, stat):
+    digest = hashlib.sha1()
+    digest.update(values.tobytes())
+    digest.update(f"{window}:{stat}".encode())
+    return digest.hexdigest()
+
+
+def _window_sums(values, window):
+    """Per-window count of present values, their sum and sum of squares."""
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+
+    def moving(a):
+        total = np.concatenate(([0.0], np.cumsum(a)))
+        ends = np.arange(1, len(a) + 1)
+        return total[ends] - total[np.maximum(ends - window, 0)]
+
+    return moving(present.astype("float64")), moving(filled), moving(filled ** 2)
+
+
+def _moving_extreme(values, window, accumulate, fill):
+    """Trailing-window extreme with the van Herk/Gil-Werman scheme."""
+    n = len(values)
+    padded = np.concatenate((np.full(window - 1, fill), np.where(np.isnan(values), fill, values)))
+    blocks = -(-len(padded) // window)
+    padded = np.concatenate((padded, np.full(blocks * window - len(padded), fill))).reshape(blocks, window)
+
+    prefix = accumulate(padded, axis=1).ravel()
+    suffix = accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+
+    starts = np.arange(n)
+    result = accumulate(np.stack((suffix[starts], prefix[starts + window - 1])), axis=0)[-1]
+    return np.where(np.isinf(result), np.nan, result)
+
+
+def compute(values, window, stat):
+    """``stat`` over the trailing ``window`` values ending at every position."""
+    values = np.asarray(values, dtype="float64")
+    window = max(int(window), 1)
+
+    if stat in ("mean", "std"):
+        # Centre first: the sums of squares of raw populations lose precision.
+        shift = np.nanmean(values) if np.isfinite(values).any() else 0.0
+        count, total, squares = _window_sums(values - shift, window)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = total / count
+            if stat == "mean":
+                return mean + shift
+            variance = (squares - count * mean ** 2) / (count - 1)
+            return np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+    if stat == "min":
+        return _moving_extreme(values, window, np.minimum.accumulate, np.inf)
+    if stat == "max":
+        return _moving_extreme(values, window, np.maximum.accumulate, -np.inf)
+    if stat == "median":
+        return pd.Series(values).rolling(window, min_periods=1).median().to_numpy()
+    if stat == "ewm":
+        return pd.Series(values).ewm(span=window, ignore_na=True).mean().to_numpy()
+    raise ValueError(f"unknown statistic: {stat}")
+
+
+def window_statistic(values, window, stat):
+    """``compute``, memoized. The returned array is shared and read-only."""
+    values = np.asarray(values, dtype="float64")
+    key = _key(values, window, stat)
+
+    with _lock:
+        if key in _results:
+            _results.move_to_end(key)
+            return _results[key]
+
+    result = compute(values, window, stat)
+    result.flags.writeable = False
+
+    with _lock:
+        _results[key] = result
+        while len(_results) > MAX_RESULTS:
+            _results.popitem(last=False)
+
+    return result
@@ -0,0 +1,140 @@
+"""Running aggregates that absorb appended rows without revisiting old ones.
+
+``RunningStatistics`` keeps, for every column of a numeric block, the count,
+mean and sum of squared deviations (merged batch by batch with the parallel
+form of Welford's algorithm), the minimum and maximum, and the sorted
+values as an order-statistics structure for exact medians and quantiles.
+With an ``accuracy`` the sorted values are replaced by KLL sketches
+(``analysis.sketch``), which keep memory bounded for streams of any length
+at the price of approximate medians and quantiles; everything else stays
+exact. States of two parts of a stream ``merge`` into the state of the whole.
+Missing values are ignored. ``follow`` keeps one such object per cache key
+in step with the loader's frames, feeding it only the rows added since it
+was last updated.
+"""
+
+import numpy as np
+
+from analysis.sketch import QuantileSketch
+
+SUPPORTED = ("count", "mean", "median", "min", "max", "range", "std", "var")
+
+
+class RunningStatistics:
+    def __init__(self, width, accuracy=None):
+        self.count = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+        self.min = np.full(width, np.inf)
+        self.max = np.full(width, -np.inf)
+        self.sorted = [np.empty(0) for _ in range(width)] if accuracy is None else None
+        self.sketches = [QuantileSketch(accuracy) for _ in range(width)] if accuracy is not None else None
+
+    def _combine(self, count, mean, m2, minimum, maximum):
+        used = count > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            total = self.count + count
+            delta = mean - self.mean
+            self.mean = np.where(used, self.mean + delta * count / total, self.mean)
+            self.m2 = np.where(used, self.m2 + m2 + delta ** 2 * self.count * count / total, self.m2)
+
+        self.count = total
+        self.min = np.where(used, np.fmin(self.min, minimum), self.min)
+        self.max = np.where(used, np.fmax(self.max, maximum), self.max)
+
+    def update(self, block):
+        """Absorb the rows of a (rows, width) float block."""
+        block = np.asarray(block, dtype="float64")
+        if not len(block):
+            return
+
+        present = ~np.isnan(block)
+        count = present.sum(axis=0)
+        used = count > 0
+        if not used.any():
+            return
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(used, np.nansum(block, axis=0) / count, 0)
+            m2 = np.nansum((block - mean) ** 2, axis=0)
+        self._combine(
+            count, mean, m2,
+            np.min(np.where(present, block, np.inf), axis=0),
+            np.max(np.where(present, block, -np.inf), axis=0),
+        )
+
+        for column in np.flatnonzero(used):
+            if self.sketches is not None:
+                self.sketches[column].update(block[present[:, column], column])
+                continue
+            values = np.sort(block[present[:, column], column])
+            existing = self.sorted[column]
+            self.sorted[column] = np.insert(existing, np.searchsorted(existing, values), values)
+
+    def merge(self, other):
+        """Absorb ``other``, the state of another part of the stream with the same columns and accuracy."""
+        self._combine(other.count, other.mean, other.m2, other.min, other.max)
+        if self.sketches is not None:
+            for sketch, part in zip(self.sketches, other.sketches):
+                sketch.merge(part)
+        else:
+            self.sorted = [np.sort(np.concatenate(pair), kind="mergesort") for pair in zip(self.sorted, other.sorted)]
+
+    def quantile(self, q):
+        """Quantile of every column, linearly interpolated as ``np.quantile`` computes it.
+
+        Approximate when the state keeps sketches instead of sorted values.
+        """
+        if self.sketches is not None:
+            return np.array([sketch.quantile(q) for sketch in self.sketches])
+
+        result = np.full(len(self.sorted), np.nan)
+        for column, values in enumerate(self.sorted):
+            if len(values):
+                position = q * (len(values) - 1)
+                low = int(np.floor(position))
+                high = min(low + 1, len(values) - 1)
+                result[column] = values[low] + (values[high] - values[low]) * (position - low)
+        return result
+
+    def result(self, stat, ddof=0):
+        empty = self.count == 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if stat == "count":
+                return self.count.copy()
+            if stat == "mean":
+                return np.where(empty, np.nan, self.mean)
+            if stat == "median":
+                return self.quantile(0.5)
+            if stat == "min":
+                return np.where(empty, np.nan, self.min)
+            if stat == "max":
+                return np.where(empty, np.nan, self.max)
+            if stat == "range":
+                return np.where(empty, np.nan, self.max - self.min)
+            if stat == "var":
+                return np.where(self.count > ddof, self.m2 / (self.count - ddof), np.nan)
+            if stat == "std":
+                return np.sqrt(self.result("var", ddof))
+        raise ValueError(f"unsupported statistic: {stat}")
+
+
+def follow(store, key, data, generation, start, absorb):
+    """Bring the running state cached under ``key`` up to date with ``data``.
+
+    ``store`` maps keys to ``(generation, rows, state)``. When ``data`` is
+    not an extension of the frame the state was built from (another
+    generation, or fewer rows), ``start()`` creates a fresh state. Then
+    ``absorb(state, rows)`` is called with only the rows not seen yet.
+    Returns the state.
+    """
+    entry = store.get(key)
+    if entry is None or entry[0] != generation or entry[1] > len(data):
+        state, seen = start(), 0
+    else:
+        _, seen, state = entry
+
+    if seen < len(data):
+        absorb(state, data.iloc[seen:])
+    store[key] = (generation, len(data), state)
+    return state
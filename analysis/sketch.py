@@ -0,0 +1,97 @@
+"""Mergeable quantile sketches for streams too large to sort.
+
+``QuantileSketch`` is a KLL sketch (Karnin, Lang and Liberty, "Optimal
+Quantile Approximation in Streams", 2016). Values enter level 0; when a
+level holds more than its capacity, it is sorted and every other value
+(from a random offset) moves one level up with twice the weight, the rest
+being dropped. Capacities shrink geometrically towards the lower levels, so
+a sketch holds about ``3 * k`` values however long the stream is, and the
+rank of any value is off by roughly ``rank_error(k)`` of the count.
+
+Whole batches are added at once: a batch lands in level 0 and is compacted
+in one vectorized pass per level. Two sketches of parts of a stream merge
+level by level into a sketch of the whole. While a sketch has seen at most
+``k`` values nothing is compacted and its quantiles are exact.
+"""
+
+import numpy as np
+
+DEFAULT_K = 200
+SEED = 2023
+
+
+def rank_error(k):
+    """Normalized rank error of a single quantile at about 99% confidence.
+
+    Empirical fit for KLL sketches from the Apache DataSketches documentation.
+    """
+    return 2.296 / k ** 0.9723
+
+
+class QuantileSketch:
+    def __init__(self, k=DEFAULT_K, seed=SEED):
+        if k < 2:
+            raise ValueError("k must be at least 2")
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                odd = len(items) % 2
+                promoted = items[odd + self._rng.integers(2)::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """Add a batch of values; missing values are ignored."""
+        values = np.asarray(values, dtype="float64").ravel()
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """Absorb ``other``, a sketch of another part of the stream."""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def __len__(self):
+        """Number of values held, not the number seen (that is ``count``)."""
+        return sum(len(items) for items in self.levels)
+
+    def quantile(self, q):
+        """Approximate ``np.quantile`` of the stream at ``q`` (a float or an array); NaN when empty.
+
+        Every held value stands for a run of ranks as long as its weight and
+        sits at the middle of that run; values between are interpolated
+        linearly, which reproduces ``np.quantile`` while nothing is compacted.
+        """
+        q = np.asarray(q, dtype="float64")
+        if not self.count:
+            return np.full(q.shape, np.nan)[()]
+
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(values), 2.0 ** level) for level, values in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        items, weights = items[order], weights[order]
+        centres = np.cumsum(weights) - (weights + 1) / 2
+        return np.interp(q * (self.count - 1), centres, items)[()]
@@ -0,0 +1,222 @@
+"""Streamlit controls shared by the analysis pages."""
+
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from analysis import charts, correlation, profiling, resampling, rolling, schema, years as year_range
+from analysis.downsample import DEFAULT_BUDGET
+from analysis.figures import get_figure, get_figures
+from analysis.loader import export_csv
+from analysis.paths import DATA_PATH
+from analysis.periods import DEFAULT_BREAKPOINTS
+
+_SELECTED_YEARS = "Selected years"
+
+
+def year_picker(data):
+    """Sidebar slider restricting the page to a range of years; returns (first, last), None for all years.
+
+    The range is kept in the session state as well, and ``show_chart``,
+    ``correlation_section`` and ``significance_table`` restrict their charts
+    and statistics to it, also in fragment reruns.
+    """
+    first, last = year_range.bounds(data)
+
+    with st.sidebar:
+        start, end = st.slider("Years", first, last, (first, last), key="Year range")
+
+    years = None if (start, end) == (first, last) else (int(start), int(end))
+    st.session_state[_SELECTED_YEARS] = years
+    return years
+
+
+def selected_years():
+    """Year range picked with ``year_picker`` in this session, None for all years."""
+    return st.session_state.get(_SELECTED_YEARS)
+
+
+def period_picker(data):
+    """Sidebar control for the period split; returns breakpoints for ``analysis.periods``."""
+    first, last = int(data["Year"].min()), int(data["Year"].max())
+    default = [year for year in DEFAULT_BREAKPOINTS[1:-1] if first < year <= last]
+
+    with st.sidebar:
+        starts = st.multiselect(
+            "Periods start in",
+            list(range(first + 1, last + 1)),
+            default=default,
+            help=f"Years that open a new period. The first period always starts in {first}.",
+        )
+
+    return (first, *sorted(starts), last + 1)
+
+
+def point_budget():
+    """Sidebar controls for line charts; returns the per-chart point budget, None for all points.
+
+    Charts are downsampled for display only, so the full-resolution data is
+    offered for download next to the control.
+    """
+    with st.sidebar:
+        budget = st.select_slider(
+            "Points per line chart",
+            options=[100, 250, 500, 1000, 2500, 5000, "All"],
+            value=DEFAULT_BUDGET,
+        )
+        st.download_button("Download full-resolution data", export_csv(), file_name=DATA_PATH.name, mime="text/csv")
+
+    return None if budget == "All" else budget
+
+
+_batch = threading.local()
+
+
+def show_chart(builder, key=None, countries=None, **params):
+    """Build (or fetch from the figure cache) ``builder``'s chart and send it to the page.
+
+    The chart is restricted to the ``year_picker`` range; with ``countries``
+    it is built from their combined frame (see ``analysis.figures``). Inside
+    ``concurrent_charts`` the chart only reserves its place on the page and
+    is built together with the others when the block ends.
+    """
+    pending = getattr(_batch, "pending", None)
+    if pending is not None:
+        pending.append((builder, params, countries, st.empty(), key))
+        return
+
+    figure = get_figure(builder, years=selected_years(), countries=countries, **params)
+    with profiling.stage("render", builder.__name__):
+        st.plotly_chart(figure, key=key)
+
+
+@contextmanager
+def concurrent_charts(mode=None):
+    """Build the charts shown in the block concurrently, then draw them in their places.
+
+    ``mode`` is one of ``analysis.workers.MODES``; by default the figure
+    cache's ``BUILD_MODE``. Text and tables in the block are written as
+    usual; charts appear once all of them are built. Also usable as a
+    decorator of a section function, below ``st.fragment``.
+    """
+    pending = []
+    _batch.pending = pending
+    try:
+        yield
+    finally:
+        _batch.pending = None
+
+    batches = {}
+    for index, (_, _, countries, _, _) in enumerate(pending):
+        batches.setdefault(countries, []).append(index)
+
+    figures = [None] * len(pending)
+    for countries, indices in batches.items():
+        specs = [pending[index][:2] for index in indices]
+        built = get_figures(specs, mode=mode, years=selected_years(), countries=countries)
+        for index, figure in zip(indices, built):
+            figures[index] = figure
+
+    for (builder, _, _, placeholder, key), figure in zip(pending, figures):
+        with profiling.stage("render", builder.__name__):
+            placeholder.plotly_chart(figure, key=key)
+
+
+def show_sections(sections, key):
+    """Run only the section picked in a horizontal selector.
+
+    ``sections`` maps section titles to functions rendering them; sections
+    that are not picked are not executed at all. Callers wrap the page part
+    calling this, and each section, in ``st.fragment`` so that switching
+    sections or using a widget inside one reruns only that fragment.
+    """
+    title = st.radio("Section", list(sections), horizontal=True, key=key, label_visibility="collapsed")
+    sections[title]()
+
+
+def heatmap_bins(key):
+    """Controls for density heatmaps; returns the bins per axis, or None to bin in the browser."""
+    if not st.toggle("Bin on the server", value=True, key=f"{key} server binning"):
+        return None
+    return st.slider("Bins per axis", 5, 100, 20, key=f"{key} bins")
+
+
+def rolling_section(data, columns, key, budget=None):
+    """Rolling-window explorer over ``columns`` of ``data``.
+
+    Window results are memoized per (column, window, statistic) by
+    ``analysis.rolling`` and whole charts by the figure cache, so moving the
+    window slider back and forth redraws from cache.
+    """
+    longest = max(3, min(30, len(data) // 2))
+
+    column = st.selectbox("Column", columns, key=f"{key} column")
+    window = st.slider("Window, years", 2, longest, min(5, longest), key=f"{key} window")
+    stats = st.multiselect("Statistics", rolling.STATS, default=["mean"], key=f"{key} statistics")
+
+    show_chart(charts.rolling_line, key=f"{key} chart", column=column, window=window, stats=tuple(stats), budget=budget)
+
+
+def correlation_section(key, pair):
+    """Correlation heatmap of all dataset columns with a drill-down into one pair.
+
+    ``pair`` is the pair of columns selected first. Matrices are memoized
+    per dataset fingerprint and year range, so picking another pair is a
+    lookup.
+    """
+    method = st.radio("Method", correlation.METHODS, horizontal=True, key=f"{key} method", format_func=str.capitalize)
+    show_chart(charts.correlation_heatmap, key=f"{key} heatmap", method=method)
+
+    columns = list(schema.COLUMNS)
+    left, right = st.columns(2)
+    first = left.selectbox("First column", columns, index=columns.index(pair[0]), key=f"{key} first")
+    second = right.selectbox("Second column", columns, index=columns.index(pair[1]), key=f"{key} second")
+
+    pearson, spearman, rows = correlation.pair(first, second, years=selected_years())
+    left, middle, right = st.columns(3)
+    left.metric("Pearson r", f"{pearson:.3f}")
+    middle.metric("Spearman ρ", f"{spearman:.3f}")
+    right.metric("Rows", rows)
+
+    show_chart(charts.pair_scatter, key=f"{key} pair", x=first, y=second)
+
+
+@st.fragment(run_every=1)
+def _await(futures):
+    done = sum(future.done() for future in futures)
+    if done == len(futures):
+        st.rerun()
+    st.info(f"Running {resampling.RESAMPLES} bootstrap and permutation resamples per test: {done} of {len(futures)} done.")
+
+
+def significance_table(pairs):
+    """Bootstrap intervals and permutation p-values for the correlation of each pair.
+
+    Tests run in the background (see ``analysis.resampling``); until they
+    finish, a placeholder polls for them without blocking the page.
+    """
+    tests = {
+        (first, second, method): resampling.submit(first, second, method, years=selected_years())
+        for first, second in pairs
+        for method in resampling.METHODS
+    }
+    if not all(future.done() for future in tests.values()):
+        _await(list(tests.values()))
+        return
+
+    rows = []
+    for (first, second, method), future in tests.items():
+        result = future.result()
+        rows.append({
+            "Pair": f"{first} / {second}",
+            "Method": method.capitalize(),
+            "Correlation": result.estimate,
+            f"{resampling.CONFIDENCE:.0%} CI low": result.low,
+            f"{resampling.CONFIDENCE:.0%} CI high": result.high,
+            "p-value": result.p_value,
+            "Rows": result.rows,
+        })
+
+    st.dataframe(pd.DataFrame(rows), hide_index=True)
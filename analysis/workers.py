@@ -0,0 +1,60 @@
+"""Shared worker pools for independent jobs.
+
+Modules that split a large computation into independent batches (see
+``analysis.resampling`` and ``analysis.projection``) hand the batches to
+``map_batches``, which runs them in the calling process when the work is
+small and in a process-wide pool of spawned workers otherwise. Workers are
+spawned rather than forked: forking a server process that runs threads can
+leave locks held in the child.
+
+``map_jobs`` runs jobs in a chosen mode (``MODES``): one after another, in
+the process-wide thread pool, or in the process pool.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+MODES = ("serial", "thread", "process")
+
+_pool = None
+_threads = None
+_lock = threading.Lock()
+
+
+def process_pool():
+    """The process-wide pool, started on first use."""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(os.cpu_count(), mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def thread_pool():
+    """The process-wide thread pool, started on first use."""
+    global _threads
+    with _lock:
+        if _threads is None:
+            _threads = ThreadPoolExecutor(min(32, (os.cpu_count() or 1) + 4), thread_name_prefix="worker")
+        return _threads
+
+
+def map_jobs(function, jobs, mode):
+    """``[function(*job) for job in jobs]``, run as ``mode`` says, results in job order.
+
+    In ``process`` mode ``function`` must be a module-level function so the
+    workers can import it.
+    """
+    if mode not in MODES:
+        raise ValueError(f"unknown worker mode: {mode}")
+    if mode == "serial" or len(jobs) < 2:
+        return [function(*job) for job in jobs]
+    pool = thread_pool() if mode == "thread" else process_pool()
+    return list(pool.map(function, *zip(*jobs)))
+
+
+def map_batches(function, jobs, parallel):
+    """``map_jobs`` in the process pool when ``parallel`` is true, serially otherwise."""
+    return map_jobs(function, jobs, "process" if parallel else "serial")
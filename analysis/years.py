@@ -0,0 +1,53 @@
+"""Year-range selection by binary search on the sorted Year column.
+
+``select`` restricts a frame to the rows of an inclusive year range with two
+``np.searchsorted`` calls and a positional slice, so the result is a view
+sharing the frame's arrays rather than a filtered copy. Frames whose Year
+column is not sorted (the synthetic benchmark datasets repeat their years)
+are stably sorted by year once, and the sorted copy is kept for as long as
+the frame itself is cached.
+"""
+
+import threading
+import weakref
+
+import numpy as np
+
+_sorted = {}
+_lock = threading.Lock()
+
+
+def bounds(data):
+    """First and last year of ``data``."""
+    return int(data["Year"].min()), int(data["Year"].max())
+
+
+def by_year(data):
+    """``data`` itself when its years are sorted, otherwise a stably sorted copy, memoized."""
+    if data["Year"].is_monotonic_increasing:
+        return data
+
+    key = id(data)
+    with _lock:
+        entry = _sorted.get(key)
+        if entry is not None and entry[0]() is data:
+            return entry[1]
+
+        ordered = data.sort_values("Year", kind="stable")
+        _sorted[key] = (weakref.ref(data, lambda _: _sorted.pop(key, None)), ordered)
+        return ordered
+
+
+def span(data, first, last):
+    """Positional slice of the rows of ``by_year(data)`` from ``first`` to ``last`` inclusive."""
+    values = by_year(data)["Year"].to_numpy()
+    start = np.searchsorted(values, first, side="left")
+    stop = np.searchsorted(values, last, side="right")
+    return slice(int(start), int(stop))
+
+
+def select(data, years=None):
+    """Rows of ``data`` with a year in ``years`` (a (first, last) pair, inclusive); all rows for None."""
+    if years is None:
+        return data
+    return by_year(data).iloc[span(data, *years)]
@@ -0,0 +1,77 @@
+"""Load time and memory of the country registry against the number of files.
+
+Writes ``--files`` synthetic country datasets (see ``benchmarks.synthetic``;
+each holds ``--scale`` noisy copies of the china.csv rows) into a temporary
+directory and loads the first 1, 2, 4, ... of them with
+``analysis.registry.load_countries`` in every worker mode. Every load runs
+from empty caches: the binary caches are deleted first. Per run the output
+shows the seconds, rows and megabytes of the combined frame, and the
+seconds and megabytes per file, which stay flat when loading scales
+linearly.
+
+    python -m benchmarks.countries [--files 16] [--scale 100] [--modes serial process]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from analysis import columnar, registry
+
+MODES = ("serial", "process")
+
+
+def _counts(files):
+    count = 1
+    while count < files:
+        yield count
+        count *= 2
+    yield files
+
+
+def run(files=16, scale=100, modes=MODES, log=print):
+    from benchmarks import synthetic
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        names = [f"country_{index:03d}" for index in range(files)]
+        for index, name in enumerate(names):
+            synthetic.write(Path(directory) / f"{name}.csv", scale, seed=index)
+
+        countries = list(registry.discover(directory))
+        for mode in modes:
+            for count in _counts(files):
+                for cache in Path(directory).glob(f"*{columnar.SUFFIX}"):
+                    cache.unlink()
+                registry.clear()
+
+                started = time.perf_counter()
+                data = registry.load_countries(countries[:count], directory, mode)
+                seconds = time.perf_counter() - started
+                megabytes = data.memory_usage(deep=True).sum() / 1e6
+
+                row = {"mode": mode, "files": count, "rows": len(data), "seconds": seconds, "megabytes": megabytes}
+                rows.append(row)
+                log(f"{mode:8} {count:4} files {len(data):9} rows {seconds:8.3f} s {megabytes:9.1f} MB "
+                    f"{seconds / count:8.4f} s/file {megabytes / count:7.2f} MB/file")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark loading many country datasets.")
+    parser.add_argument("--files", type=int, default=16, help="largest number of country files")
+    parser.add_argument("--scale", type=int, default=100, help="copies of the china.csv rows per file")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    arguments = parser.parse_args(argv)
+
+    run(arguments.files, arguments.scale, arguments.modes)
+    return 0
+
+
+if __name__ == "__main__":
+    # Run the imported module, so the workers can unpickle ``registry._read``.
+    from benchmarks.countries import main
+
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Headless latency and memory benchmark of the Streamlit pages.
+
+Every page is executed with Streamlit's ``AppTest`` against china.csv and
+against synthetic datasets scaled to a multiple of its rows (see
+``benchmarks.synthetic``). Each (page, dataset) pair runs in a fresh worker
+process, so the first run includes imports and empty caches:
+
+* ``cold``    - first run of the page, default selectbox branch;
+* ``branch``  - first run after switching the selectbox to another branch;
+* ``section`` - first run after picking another section of a branch;
+* ``warm``    - median of repeated reruns of a branch with nothing changed.
+
+Peak memory is the worker's peak resident set size after each phase.
+Results are written as JSON; ``--compare`` prints the change against an
+earlier result file.
+
+Every measurement is repeated for each figure build mode (``--modes``, see
+``analysis.workers``): sections build their charts one after another
+(``serial``) or concurrently in threads or processes. The output ends with
+the latency of every first run of a section next to its serial latency.
+
+    python -m benchmarks.pages [--scales 1 10 100 1000] [--modes serial thread process]
+                               [--output results.json] [--compare old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from analysis.paths import DATA_PATH, ROOT
+
+PAGES = {
+    "Main_page.py": [],
+    "pages/Population_analysis.py": ["Population analysis", "Hypothesis"],
+    "pages/Fertility_rate_analysis.py": ["Life in China analysis", "Hypothesis"],
+    "pages/Country_comparison.py": [],
+}
+
+SCALES = (1, 10, 100, 1000)
+MODES = ("serial", "thread", "process")
+# Phases that build a section's figures from an empty cache.
+FIRST_RUNS = ("cold", "branch", "section")
+# Label of the radio picking a section (see ``analysis.widgets.show_sections``).
+SECTION_LABEL = "Section"
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _timed(app, action=None):
+    started = time.perf_counter()
+    (action or app.run)()
+    elapsed = time.perf_counter() - started
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    return elapsed
+
+
+def _record(results, phase, seconds, branch=None, section=None):
+    results.append({
+        "phase": phase,
+        "branch": branch,
+        "section": section,
+        "seconds": round(seconds, 6),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    })
+
+
+def _section_radio(app):
+    return next(radio for radio in app.radio if radio.label == SECTION_LABEL)
+
+
+def _warm(app, repeat):
+    return statistics.median(_timed(app) for _ in range(repeat))
+
+
+def measure(page, repeat=5, timeout=600):
+    """Run ``page`` through all its branches and sections in this process."""
+    sys.path.insert(0, str(ROOT))
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(ROOT / page), default_timeout=timeout)
+    results = []
+
+    branches = PAGES[page] or [None]
+    _record(results, "cold", _timed(app), branches[0])
+
+    for index, branch in enumerate(branches):
+        if index:
+            _record(results, "branch", _timed(app, lambda: app.selectbox[0].select(branch).run()), branch)
+
+        radios = [radio for radio in app.radio if radio.label == SECTION_LABEL]
+        sections = radios[0].options if radios else []
+        for section in sections[1:]:
+            _record(results, "section", _timed(app, lambda: _section_radio(app).set_value(section).run()), branch, section)
+        if sections:
+            _section_radio(app).set_value(sections[0]).run()
+
+        _record(results, "warm", _warm(app, repeat), branch)
+
+    return results
+
+
+def _worker(page, dataset, repeat, mode):
+    environment = dict(os.environ, CHINA_DATASET=str(dataset), CHINA_FIGURE_WORKERS=mode)
+    command = [sys.executable, "-m", "benchmarks.pages", "--worker", page, "--repeat", str(repeat)]
+    completed = subprocess.run(command, cwd=ROOT, env=environment, capture_output=True, text=True, check=False)
+    if completed.returncode:
+        raise RuntimeError(f"{page} on {dataset} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales=SCALES, pages=tuple(PAGES), repeat=5, modes=MODES, log=print):
+    from benchmarks import synthetic
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            if scale == 1:
+                dataset = DATA_PATH
+            else:
+                dataset = synthetic.write(os.path.join(directory, f"china_x{scale}.csv"), scale)
+
+            for page in pages:
+                for mode in modes:
+                    for row in _worker(page, dataset, repeat, mode):
+                        row.update(page=page, scale=scale, mode=mode)
+                        results.append(row)
+                        log(_format(row))
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def _key(row, mode=None):
+    return row["page"], row["scale"], mode or row.get("mode", "serial"), row["phase"], row["branch"], row["section"]
+
+
+def _label(row):
+    parts = (row["page"], f"x{row['scale']}", row["phase"], row["branch"], row["section"])
+    return " / ".join(str(part) for part in parts if part is not None)
+
+
+def _format(row, previous=None):
+    label = f"{_label(row)} [{row.get('mode', 'serial')}]"
+    line = f"{label}: {row['seconds'] * 1000:.1f} ms, peak {row['peak_rss_mb']:.0f} MB"
+    if previous is not None:
+        line += f" ({row['seconds'] / previous['seconds'] - 1:+.0%} time, {row['peak_rss_mb'] - previous['peak_rss_mb']:+.0f} MB)"
+    return line
+
+
+def compare(current, previous):
+    """Lines describing every result of ``current`` next to the same result in ``previous``."""
+    earlier = {_key(row): row for row in previous["results"]}
+    return [_format(row, earlier.get(_key(row))) for row in current["results"]]
+
+
+def parallel_summary(report):
+    """Lines comparing the first-run latency of every section per mode with the serial one."""
+    rows = [row for row in report["results"] if row["phase"] in FIRST_RUNS]
+    serial = {_key(row): row for row in rows if row.get("mode", "serial") == "serial"}
+
+    lines = []
+    for row in rows:
+        baseline = serial.get(_key(row, "serial"))
+        if row.get("mode", "serial") == "serial" or baseline is None:
+            continue
+        lines.append(
+            f"{_label(row)}: serial {baseline['seconds'] * 1000:.1f} ms, "
+            f"{row['mode']} {row['seconds'] * 1000:.1f} ms ({row['seconds'] / baseline['seconds'] - 1:+.0%})"
+        )
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Streamlit pages headlessly.")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES), help="dataset sizes as multiples of china.csv")
+    parser.add_argument("--pages", nargs="+", default=list(PAGES), choices=list(PAGES))
+    parser.add_argument("--repeat", type=int, default=5, help="reruns per warm measurement")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=list(MODES), help="figure build modes to measure")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    arguments = parser.parse_args(argv)
+
+    if arguments.worker:
+        print(json.dumps(measure(arguments.worker, arguments.repeat)))
+        return 0
+
+    report = run(arguments.scales, arguments.pages, arguments.repeat, arguments.modes)
+
+    summary = parallel_summary(report)
+    if summary:
+        print("\nSection latency against serial figure building:")
+        print("\n".join(summary))
+
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if arguments.compare:
+        with open(arguments.compare) as earlier:
+            print("\n".join(compare(report, json.load(earlier))))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Accuracy, time and memory of the streaming statistics against the in-memory ones.
+
+For every ``k`` the dataset is summarized twice: exactly, by loading it and
+calling ``analysis.describe.describe`` and ``analysis.periods.aggregate``,
+and by streaming it in chunks through ``stream_statistics`` and
+``stream_aggregate``. The output shows, per ``k``, the largest relative
+difference of the exact streaming statistics (mean, std, min, max; these
+must agree to rounding) and the largest normalized rank error of the
+sketched medians and quantiles next to ``analysis.sketch.rank_error(k)``.
+The exit status is 1 when an exact statistic disagrees or a rank error
+exceeds twice the bound, so the script doubles as a check.
+
+china.csv has 73 rows, fewer than any reasonable ``k``, so its sketches
+never compact and must match exactly; small chunks and ``k`` values below
+73 exercise the approximation. ``--scale`` runs on a synthetic dataset with
+that many copies of the rows instead (see ``benchmarks.synthetic``).
+
+    python -m benchmarks.quantiles [CSV] [--scale N] [--k 8 32 200] [--chunk-rows 10]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+from analysis import describe, periods, schema, sketch
+from analysis.paths import DATA_PATH
+
+QUANTILES = (0.1, 0.25, 0.75, 0.9)
+EXACT = ("mean", "std", "min", "max")
+
+
+def _measure(function, *args, **kwargs):
+    """Result, seconds and peak traced megabytes of a call; timed and traced in separate runs."""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    function(*args, **kwargs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def _relative(approximate, exact):
+    approximate, exact = np.asarray(approximate, dtype="float64"), np.asarray(exact, dtype="float64")
+    scale = np.maximum(np.abs(exact), 1e-12)
+    return float(np.nanmax(np.abs(approximate - exact) / scale, initial=0))
+
+
+def _rank_error(values, estimate, q):
+    """Distance between the rank ``estimate`` has among ``values`` and the rank of quantile ``q``, over their count."""
+    values = np.sort(values[~np.isnan(values)])
+    if not len(values):
+        return 0.0
+    target = q * (len(values) - 1)
+    low, high = np.searchsorted(values, estimate, "left"), np.searchsorted(values, estimate, "right")
+    # A value between two data points may stand for any rank between theirs.
+    low, high = (low - 1, low) if low == high else (low, high - 1)
+    return float(max(low - target, target - high, 0) / len(values))
+
+
+def compare(path, k, chunk_rows):
+    """Largest exact-statistic difference and sketch rank error of the streamed statistics at ``k``, with timings."""
+    data, exact_seconds, exact_mb = _measure(schema.read_csv, path)
+    exact = describe.describe(data, list(schema.COLUMNS), QUANTILES)
+    exact_periods = periods.aggregate(data, periods.DEFAULT_BREAKPOINTS, ("mean", "std", "median"))
+
+    streamed, stream_seconds, stream_mb = _measure(
+        describe.stream_statistics, path, None, QUANTILES, accuracy=k, chunk_rows=chunk_rows
+    )
+    streamed_periods = periods.stream_aggregate(
+        path, periods.DEFAULT_BREAKPOINTS, ("mean", "std", "median"), accuracy=k, chunk_rows=chunk_rows
+    )
+
+    difference = max(_relative(streamed[stat], exact[stat]) for stat in EXACT)
+    difference = max(difference, *(
+        _relative(streamed_periods.xs(stat, axis=1, level=1), exact_periods.xs(stat, axis=1, level=1))
+        for stat in ("mean", "std")
+    ))
+
+    rank = 0.0
+    for column in schema.COLUMNS:
+        values = data[column].to_numpy(dtype="float64", na_value=np.nan)
+        for q, name in [(0.5, "median"), *((q, f"q{q:g}") for q in QUANTILES)]:
+            rank = max(rank, _rank_error(values, streamed.at[column, name], q))
+
+    period = periods.assign(data)
+    for label in periods.labels(periods.DEFAULT_BREAKPOINTS):
+        rows = data[(period == label).to_numpy()]
+        for column in streamed_periods.columns.get_level_values(0).unique():
+            values = rows[column].to_numpy(dtype="float64", na_value=np.nan)
+            rank = max(rank, _rank_error(values, streamed_periods.at[label, (column, "median")], 0.5))
+
+    return {
+        "k": k,
+        "rows": len(data),
+        "exact_difference": difference,
+        "rank_error": rank,
+        "rank_bound": sketch.rank_error(k),
+        "exact_seconds": exact_seconds,
+        "exact_mb": exact_mb,
+        "stream_seconds": stream_seconds,
+        "stream_mb": stream_mb,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare streaming statistics with the in-memory ones.")
+    parser.add_argument("path", nargs="?", default=str(DATA_PATH), help="CSV in the china.csv layout")
+    parser.add_argument("--scale", type=int, help="use a synthetic dataset with this many copies of the rows")
+    parser.add_argument("--k", type=int, nargs="+", default=[8, 32, sketch.DEFAULT_K], help="sketch sizes to check")
+    parser.add_argument("--chunk-rows", type=int, default=10, help="rows per streamed chunk")
+    arguments = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = arguments.path
+        if arguments.scale:
+            from benchmarks import synthetic
+
+            path = synthetic.write(Path(directory) / f"china_x{arguments.scale}.csv", arguments.scale)
+
+        failed = False
+        for k in arguments.k:
+            row = compare(path, k, arguments.chunk_rows)
+            bad = (
+                row["exact_difference"] > 1e-6
+                or row["rank_error"] > 2 * row["rank_bound"]
+                or (row["rows"] <= k and row["rank_error"] > 0)
+            )
+            failed |= bad
+            print(f"k={k:<5} rows={row['rows']:<9} exact stats max rel diff {row['exact_difference']:.2e}  "
+                  f"rank error {row['rank_error']:.4f} (bound {row['rank_bound']:.4f})  "
+                  f"in-memory {row['exact_seconds']:.2f} s / {row['exact_mb']:.1f} MB  "
+                  f"streamed {row['stream_seconds']:.2f} s / {row['stream_mb']:.1f} MB"
+                  f"{'  FAIL' if bad else ''}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Synthetic datasets in the china.csv layout, scaled by row count.
+
+A dataset of scale ``k`` holds ``k`` copies of the china.csv years, as if
+it described ``k`` regions: every copy is the original series with a small
+multiplicative noise, and the Null cells stay Null. The file is written as
+text in the original layout (Indian digit grouping, percentage strings), so
+loading it exercises the same parser as the real file.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from analysis import schema
+from analysis.paths import DATA_PATH
+
+
+def group_digits(value):
+    """Indian digit grouping: 543979233 -> "54,39,79,233"."""
+    digits = str(value)
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return ",".join(groups + [tail])
+
+
+def scaled(scale, seed=0):
+    """Cleaned-dtype frame with ``scale`` noisy copies of china.csv."""
+    base = schema.read_csv(DATA_PATH)
+    rng = np.random.default_rng(seed)
+    frame = pd.concat([base] * scale, ignore_index=True)
+
+    for name, kind in schema.COLUMNS.items():
+        if kind == schema.YEAR:
+            continue
+        noise = 1 + rng.normal(0, 0.02, len(frame))
+        values = frame[name].astype("float64") * noise
+        frame[name] = values.round() if kind == schema.COUNT else values
+
+    return frame
+
+
+def to_text(frame):
+    """``frame`` formatted the way the Kaggle export writes china.csv."""
+    text = pd.DataFrame(index=frame.index)
+
+    for name, kind in schema.COLUMNS.items():
+        column = frame[name]
+        if kind == schema.YEAR:
+            text[name] = column.astype("int64").astype(str)
+        elif kind == schema.COUNT:
+            text[name] = column.map(lambda value: group_digits(int(value)), na_action="ignore")
+        elif kind == schema.PERCENT:
+            text[name] = column.map("{:.2f}%".format, na_action="ignore")
+        else:
+            text[name] = column.round(3).astype(str)
+
+    return text.fillna("Null").replace("nan", "Null")
+
+
+def write(path, scale, seed=0):
+    to_text(scaled(scale, seed)).to_csv(path, index=False)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic dataset in the china.csv layout.")
+    parser.add_argument("path", help="output CSV file")
+    parser.add_argument("--scale", type=int, default=10, help="number of copies of the china.csv rows")
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args(argv)
+
+    write(arguments.path, arguments.scale, arguments.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+import streamlit as st
+
+from analysis import charts, profiling, registry
+from analysis.widgets import concurrent_charts, point_budget, show_chart, year_picker
+
+with st.sidebar:
+    st.title("Country comparison")
+    st.text("This page compares China with other countries whose datasets have the same layout as china.csv.")
+
+st.title("Country comparison 🌏")
+
+profiling.begin()
+
+available = list(registry.discover())
+
+if len(available) < 2:
+    st.info(
+        f"Only {', '.join(available) or 'no country'} is registered. Put more CSV files in the china.csv layout "
+        f"into {registry.DIRECTORY}, or point the CHINA_DATASETS environment variable to a directory holding them, "
+        "to compare countries."
+    )
+
+default = (["China"] if "China" in available else []) + [name for name in available if name != "China"][:3]
+countries = tuple(st.multiselect("Countries", available, default=default))
+
+if not countries:
+    st.text("Pick at least one country to compare.")
+    st.stop()
+
+data = registry.load_countries(countries)
+year_picker(data)
+budget = point_budget()
+
+
+@st.fragment
+@concurrent_charts()
+def comparison():
+    layout = st.radio("Layout", charts.LAYOUTS, horizontal=True, format_func=str.capitalize, key="Comparison layout")
+    st.text("Overlay draws every country in one chart; facet gives each country a chart of its own.")
+
+    for title, columns in charts.COMPARISONS.items():
+        st.subheader(title)
+        show_chart(
+            charts.country_line, key=f"comparison {title}", countries=countries, columns=columns, layout=layout,
+            budget=budget,
+        )
+
+
+comparison()
+
+profiling.panel()
@@ -1,7 +1,15 @@
+import numpy as np
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+
+from analysis import charts, profiling, projection
+from analysis.derived import load_derived
+from analysis.periods import period_statistics
+from analysis.widgets import (
+    concurrent_charts, correlation_section, heatmap_bins, period_picker, point_budget, rolling_section, show_chart,
+    show_sections, significance_table, year_picker,
+)
+from analysis.years import select
 
 with st.sidebar:
     st.title("Fertility rate analysis")
@@ -9,91 +17,31 @@ with st.sidebar:
 
 st.title("Fertility analysis 🍼")
 
-data = pd.read_csv("china.csv")
-data = data.astype("string")
-data = data.replace("Null", "0")
-data = data.map(lambda x: x.replace(",", ""))
-data = data.map(lambda x: x.replace("%", ""))
-
-
-def convert_range(lhs, rhs, to_type):
-    data.loc[0:74, lhs:rhs] = data.loc[0:73, lhs:rhs].astype(to_type)
-
-
-convert_range("% Increase in Population", "% Increase in Population Density", "float64")
-convert_range("Urban Population % of Total Population", "% Increase in Urban Population", "float64")
-convert_range("Rural Population % of Total Population", "% Change in Net Migration Rate", "float64")
+profiling.begin()
 
-data["Year"] = data["Year"].astype("int64")
-data["Population"] = data["Population"].astype("int64")
-data["Urban Population"] = data["Urban Population"].astype("int64")
-data["Rural Population"] = data["Rural Population"].astype("int64")
+data = load_derived()
+years = year_picker(data)
+data = select(data, years)
+breakpoints = period_picker(data)
+budget = point_budget()
 
 
-f_p = data.loc[0:30, "Life Expectancy":"% Change in Net Migration Rate"]
-s_p = data.loc[31:49, "Life Expectancy":"% Change in Net Migration Rate"]
-t_p = data.loc[50:72, "Life Expectancy":"% Change in Net Migration Rate"]
-
-
-def fertility_rate_analysis():
-    st.subheader("Life in China analysis")
-
+@st.fragment
+def life_expectancy():
     st.text("First, let's look at how life expectancy in China has changed over time:")
 
-    f_p_life = pd.DataFrame(
-        {
-            "Year": [year for year in range(1950, 1981)],
-            "Period": ["1950-1980"] * 31, 
-            "Life expectancy": f_p["Life Expectancy"]
-        }
-    )
-
-    s_p_life = pd.DataFrame(
-        {
-            "Year": [year for year in range(1981, 2000)],
-            "Period": ["1981-1999"] * 19, 
-            "Life expectancy": s_p["Life Expectancy"]
-        }
-    )
-
-    t_p_life = pd.DataFrame(
-        {
-            "Year": [year for year in range(2000, 2023)],
-            "Period": ["2000-2022"] * 23, 
-            "Life expectancy": t_p["Life Expectancy"]
-        }
-    )
-
-    life = pd.concat([f_p_life, s_p_life, t_p_life])
-
-    figure = px.line(life, x="Year", y="Life expectancy", color="Period", title="Life expectancy in China", markers=True)
-    st.write(figure)
+    show_chart(charts.life_expectancy_line, key="life expectancy", breakpoints=breakpoints, budget=budget)
     st.text("Since 1950, life expectancy in China has increased, leading to an older population.")
 
+
+@st.fragment
+@concurrent_charts()
+def birth_death_rates():
     st.subheader("Birth/death rates comparison")
 
     st.text("Now, let us see how birth and death rates have been changed since 1950.")
 
-    birth = pd.DataFrame(
-        {
-            "Year": [year for year in range(1950, 2023)],
-            "Rate": data["Birth Rate"],
-            "Type": ["Birth"] * 73
-        }
-    )
-
-    death = pd.DataFrame(
-        {
-            "Year": [year for year in range(1950, 2023)],
-            "Rate": data["Death Rate"],
-            "Type": ["Death"] * 73
-        }
-    )
-
-    fertility_rate = pd.concat([birth, death])
-
-    figure = px.line(fertility_rate, x="Year", y="Rate", color="Type", title="Births and deaths in China")
-    st.write(figure)
+    show_chart(charts.birth_death_line, key="birth death", budget=budget)
     st.text("As we can see here, birth and death rates both almost tied for first place in 2022. This means the number of people passing away is increasing, while the number of people getting birth is decreasing.")
 
     st.text("To prove that, let us see the growth rate in Chian in period from 1950 to 2022.")
@@ -102,10 +50,10 @@ def fertility_rate_analysis():
 
     growth_rate = pd.DataFrame(
         {
-            "Year": [year for year in range(1950, 2023)],
+            "Year": data["Year"],
             "Birth rate": data["Birth Rate"],
             "Death rate": data["Death Rate"],
-            "Growth Rate": (data["Birth Rate"] - data["Death Rate"]) / 10
+            "Growth Rate": data["Growth Rate"]
         }
     )
 
@@ -115,10 +63,10 @@ def fertility_rate_analysis():
     code = '''
     growth_rate = pd.DataFrame(
         {
-            "Year": [year for year in range(1950, 2023)],
+            "Year": data["Year"],
             "Birth rate": data["Birth Rate"],
             "Death rate": data["Death Rate"],
-            "Growth Rate": (data["Birth Rate"] - data["Death Rate"]) / 10
+            "Growth Rate": data["Growth Rate"]
         }
     )
     '''
@@ -127,93 +75,118 @@ def fertility_rate_analysis():
 
     st.text("Finally, let us render that table as plot:")
 
-    figure = px.line(growth_rate, x="Year", y="Growth Rate", title="Growth rate")
-    st.write(figure)
+    show_chart(charts.growth_rate_line, key="growth rate", budget=budget)
     st.text("It is now evident that death rate surpasses birth rate. That may be because Chinese population became so much big that its government decided to do anything to prevent this from increase.")
 
+
+@st.fragment
+def infant_mortality_rate():
+    st.subheader("Infant mortality")
+
     st.text("Besides the decline trend in birth/death we may see some changes in infant mortality rate in China")
 
     st.text("Firstly, let's create the Infant mortality rate table")
 
-    infant_mortality = pd.DataFrame(
-        {
-            "Period": ["1950-1980", "1981-1999", "2000-2022"],
-            "Infant mortality rate": [
-                f_p["Infant Mortality Rate"].mean(),
-                s_p["Infant Mortality Rate"].mean(),
-                t_p["Infant Mortality Rate"].mean()
-            ],
-            "Fertility rate": [
-                f_p["Fertility Rate"].mean(),
-                s_p["Fertility Rate"].mean(),
-                t_p["Fertility Rate"].mean()
-            ]
-        }
+    infant_mortality = (
+        period_statistics(breakpoints, years=years)
+        .xs("mean", axis=1, level=1)[["Infant Mortality Rate", "Fertility Rate"]]
+        .rename(columns={"Infant Mortality Rate": "Infant mortality rate", "Fertility Rate": "Fertility rate"})
+        .reset_index()
     )
 
     st.write(infant_mortality)
 
     code = '''
-    infant_mortality = pd.DataFrame(
-        {
-            "Period": ["1950-1980", "1981-1999", "2000-2022"],
-            "Infant mortality rate": [
-                f_p["Infant Mortality Rate"].mean(),
-                s_p["Infant Mortality Rate"].mean(),
-                t_p["Infant Mortality Rate"].mean()
-            ],
-            "Fertility rate": [
-                f_p["Fertility Rate"].mean(),
-                s_p["Fertility Rate"].mean(),
-                t_p["Fertility Rate"].mean()
-            ]
-        }
+    infant_mortality = (
+        period_statistics(breakpoints, years=years)
+        .xs("mean", axis=1, level=1)[["Infant Mortality Rate", "Fertility Rate"]]
+        .rename(columns={"Infant Mortality Rate": "Infant mortality rate", "Fertility Rate": "Fertility rate"})
+        .reset_index()
     )
     '''
 
     st.text("Code that renders the table:")
     st.code(code, language="python")
 
-    figure = px.bar(infant_mortality, x="Period", y=["Infant mortality rate", "Fertility rate"], title="Infant mortality rate", barmode="group")
-    st.write(figure)
+    show_chart(charts.infant_mortality_bar, key="infant mortality", breakpoints=breakpoints)
 
     st.text("The plot above illustrates that, despite a decrease in infant mortality, a concurrent decline in fertility rates has resulted in a shrinking Chinese population.")
 
+
+@st.fragment
+def migration():
     st.subheader("Migration")
 
     st.text("People moving in and out of a country can affect its population. Let's look at China's migration data")
 
-    f_p_migration = pd.DataFrame(
-        {
-            "Year": [year for year in range(1950, 1981)],
-            "Period": ["1950-1981"] * 31,
-            "Migration Rate": f_p["Net Migration Rate"]
-        }
-    )
+    show_chart(charts.migration_line, key="migration", breakpoints=breakpoints, budget=budget)
+    st.text("The graph shows that fewer people are moving to China than are leaving. This is another reason why the population is decreasing.")
 
-    s_p_migration = pd.DataFrame(
-        {
-            "Year": [year for year in range(1981, 2000)],
-            "Period": ["1981-1999"] * 19,
-            "Migration Rate": s_p["Net Migration Rate"]
-        }
+
+@st.fragment
+def rolling_statistics():
+    st.subheader("Rolling statistics")
+
+    st.text("Moving statistics smooth out single years and show how fast each series changes. Pick a column, a window size and the statistics to draw:")
+
+    rolling_section(
+        data,
+        [
+            "Fertility Rate", "Life Expectancy", "Birth Rate", "Death Rate", "Growth Rate", "Infant Mortality Rate",
+            "Net Migration Rate", "Fertility Rate YoY %", "Life Expectancy YoY %",
+        ],
+        key="Fertility rolling",
+        budget=budget,
     )
 
-    t_p_migration = pd.DataFrame(
+
+@st.fragment
+def future_projection():
+    st.subheader("Projection")
+
+    st.text("The data stops in 2022. To look further, we simulate thousands of scenarios: fertility moves towards a target value, and all rates also drift randomly with the year-to-year spread of the last 20 years.")
+
+    column = st.selectbox("Column", projection.COLUMNS, key="Projection column")
+    horizon = st.slider("Project until", int(data["Year"].iloc[-1]) + 10, 2100, projection.HORIZON, step=5, key="Projection horizon")
+    low, high = st.slider("Fertility rate in the last year, from/to", 0.5, 3.0, (1.0, 2.1), step=0.1, key="Projection targets")
+    paths = st.select_slider("Scenarios per fertility target", [100, 500, 1000, 5000], projection.PATHS, key="Projection paths")
+
+    targets = tuple(round(float(target), 2) for target in np.linspace(low, high, 5))
+    show_chart(charts.projection_fan, key="projection", column=column, horizon=horizon, targets=targets, paths=paths)
+
+    st.text("The shaded bands hold the middle 50% and 90% of the scenarios, year by year. Median population and 90% bands:")
+
+    result = projection.project(data, horizon, targets, paths)
+    population = result.bands["Population"]
+    st.write(pd.DataFrame(
         {
-            "Year": [year for year in range(2000, 2023)],
-            "Period": ["2000-2022"] * 23,
-            "Migration Rate": t_p["Net Migration Rate"]
+            "Year": result.years,
+            "Low (5%)": population[0],
+            "Median": population[len(population) // 2],
+            "High (95%)": population[-1],
         }
-    )
+    ).iloc[9::10])
 
-    migration_rate = pd.concat([f_p_migration, s_p_migration, t_p_migration])
 
-    figure = px.line(migration_rate, x="Year", y="Migration Rate", color="Period", title="Migration", markers=True)
-    st.write(figure)
-    st.text("The graph shows that fewer people are moving to China than are leaving. This is another reason why the population is decreasing.")
+@st.fragment
+def fertility_rate_analysis():
+    st.subheader("Life in China analysis")
+
+    show_sections(
+        {
+            "Life expectancy": life_expectancy,
+            "Birth/death rates": birth_death_rates,
+            "Infant mortality": infant_mortality_rate,
+            "Migration": migration,
+            "Rolling statistics": rolling_statistics,
+            "Projection": future_projection,
+        },
+        key="Life in China analysis section"
+    )
 
 
+@st.fragment
+@concurrent_charts()
 def second_hypothesis():
     st.subheader("Second hypothesis")
 
@@ -228,7 +201,7 @@ def second_hypothesis():
     first_comparison = pd.DataFrame(
         {
             "Life expectancy": data["Life Expectancy"],
-            "Growth Rate": (data["Birth Rate"] - data["Death Rate"]) / 10
+            "Growth Rate": data["Growth Rate"]
         }
     )
 
@@ -247,7 +220,7 @@ def second_hypothesis():
     first_comparison = pd.DataFrame(
         {
             "Life expectancy": data["Life Expectancy"],
-            "Growth Rate": (data["Birth Rate"] - data["Death Rate"]) / 10
+            "Growth Rate": data["Growth Rate"]
         }
     )
     '''
@@ -272,15 +245,27 @@ def second_hypothesis():
 
     st.text("Now, we'll visualize the data using 2D histograms:")
 
-    figure = px.density_heatmap(first_comparison, x="Life expectancy", y="Growth Rate", color_continuous_scale="Viridis")
-    st.write(figure)
+    bins = heatmap_bins("Second hypothesis")
+
+    show_chart(charts.life_expectancy_heatmap, key="heatmap Growth Rate", against="Growth Rate", bins=bins)
     st.text("We can see that higher life expectancy is associated with lower growth rates.")
 
-    figure = px.density_heatmap(second_comparison, x="Life expectancy", y="Fertility rate", color_continuous_scale="Viridis")
-    st.write(figure)
+    show_chart(charts.life_expectancy_heatmap, key="heatmap Fertility rate", against="Fertility rate", bins=bins)
     st.text("We can also see that higher life expectancy is linked to lower fertility rates.")
 
-    st.subheader("III. Second hypothesis conclusion")
+    st.subheader("III. Correlations")
+
+    st.text("The same relationships, and every other one in the dataset, can be checked in the correlation heatmap. Pick any pair to look at it closely:")
+
+    correlation_section("Second hypothesis correlations", pair=("Life Expectancy", "Fertility Rate"))
+
+    st.subheader("IV. Significance")
+
+    st.text("A strong correlation in one sample can still be chance. Bootstrap confidence intervals show how much the coefficient varies between resamples of the years, and permutation tests give the probability of a correlation at least this strong if the columns were unrelated:")
+
+    significance_table([("Life Expectancy", "Growth Rate"), ("Life Expectancy", "Fertility Rate")])
+
+    st.subheader("V. Second hypothesis conclusion")
     st.text("In conclusion, as China's population ages and life expectancy increases, birth rates are declining.")
 
 
@@ -290,3 +275,5 @@ if categories == "Life in China analysis":
     fertility_rate_analysis()
 else:
     second_hypothesis()
+
+profiling.panel()
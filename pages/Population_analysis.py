@@ -1,7 +1,16 @@
+import inspect
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+
+from analysis import charts, profiling
+from analysis.loader import load_data
+from analysis.periods import labels
+from analysis.widgets import (
+    concurrent_charts, correlation_section, heatmap_bins, period_picker, point_budget, rolling_section, show_chart,
+    show_sections, significance_table, year_picker,
+)
+from analysis.years import select
 
 with st.sidebar:
     st.title("Population analysis")
@@ -9,48 +18,34 @@ with st.sidebar:
 
 st.title("Population analysis 🌆")
 
-data = pd.read_csv("china.csv")
-data = data.astype("string")
-data = data.replace("Null", "0")
-data = data.map(lambda x: x.replace(",", ""))
-data = data.map(lambda x: x.replace("%", ""))
-
-
-def convert_range(lhs, rhs, to_type):
-    data.loc[0:74, lhs:rhs] = data.loc[0:73, lhs:rhs].astype(to_type)
-
-
-convert_range("% Increase in Population", "% Increase in Population Density", "float64")
-convert_range("Urban Population % of Total Population", "% Increase in Urban Population", "float64")
-convert_range("Rural Population % of Total Population", "% Change in Net Migration Rate", "float64")
-
-data["Year"] = data["Year"].astype("int64")
-data["Population"] = data["Population"].astype("int64")
-data["Urban Population"] = data["Urban Population"].astype("int64")
-data["Rural Population"] = data["Rural Population"].astype("int64")
+profiling.begin()
 
+data = load_data()
+years = year_picker(data)
+data = select(data, years)
+breakpoints = period_picker(data)
+budget = point_budget()
 
-def general_population_analysis():
-    st.subheader("Population analysis")
 
+@st.fragment
+@concurrent_charts()
+def population_trend():
     st.text("Let's start the analysis from seeing the population trend in China:")
 
     # First chart
-    figure = px.bar(data, x="Year", y="Population", color="Population", title="China population")
-    st.plotly_chart(figure, key="First chart")
+    show_chart(charts.population_bar, key="First chart")
     st.text("As illustrated in the figure above, the Chinese population has experienced sustained growth since 1950.")
 
     st.text("Now, we'll turn our attention to the trend of population density growth in China:")
 
     # Second chart
-    figure = px.line(data, x="Year", y="Population Density", title="Grow in population density", markers=True)
-    st.plotly_chart(figure, key="Second chart")
+    show_chart(charts.population_density_line, key="Second chart", budget=budget)
     st.text("The plot also shows a rise in population density since 1950, meaning more people are living in a given area.")
 
-    f_p = data.loc[0:30, "Year":"Life Expectancy"]
-    s_p = data.loc[31:49, "Year":"Life Expectancy"]
-    t_p = data.loc[50:72, "Year":"Life Expectancy"]
 
+@st.fragment
+@concurrent_charts()
+def urban_rural_comparison():
     st.subheader("Urban/rural population comparison")
 
     st.text("We are to take 3 most impoartant period in history of Communist China to compare urban/rural population:")
@@ -60,183 +55,86 @@ def general_population_analysis():
     3. 2000-2022 - modern days in Chinese history
     """)
 
-    st.write("Code for these three periods:")
+    st.text("The periods can be changed in the sidebar.")
 
-    code = '''
-    f_p = data.loc[0:30, "Year":"Life Expectancy"]
-    s_p = data.loc[31:49, "Year":"Life Expectancy"]
-    t_p = data.loc[50:72, "Year":"Life Expectancy"]
-    '''
+    st.text("Let's begin by comparing the average urban and rural populations in China using a bar chart:")
 
-    st.code(code, language="python")
+    show_chart(charts.inhabitants_bar, key="Third chart", breakpoints=breakpoints, stat="mean")
+    show_chart(charts.inhabitants_bar, key="Fourth chart", breakpoints=breakpoints, stat="median")
+    st.text("It's evident that the urban population has grown since 1950, driven by people moving to cities for improved living conditions.")
 
-    st.text("Let's begin by comparing the average urban and rural populations in China using a bar chart:")
+    code = inspect.getsource(charts.inhabitants_bar)
 
-    periods_means = pd.DataFrame(
-        {
-            "Period": [
-                "1950-1980", 
-                "1950-1980",
-                "1981-1999",
-                "1981-1999",
-                "2000-2022",
-                "2000-2022"
-            ],
-            "Population": [
-                int(f_p["Urban Population"].mean()),
-                int(f_p["Rural Population"].mean()),
-                int(s_p["Urban Population"].mean()),
-                int(s_p["Rural Population"].mean()),
-                int(t_p["Urban Population"].mean()),
-                int(t_p["Rural Population"].mean())
-            ],
-            "Inhabitants": [
-                "Urban population",
-                "Rural population",
-                "Urban population",
-                "Rural population",
-                "Urban population",
-                "Rural population"
-            ]
-        }
-    )
+    st.text("Code for these bar charts:")
+    st.code(code, language="python")
 
-    figure = px.bar(periods_means, x="Period", y="Population", color="Inhabitants", title="Mean value of urban and rural population in China")
-    st.plotly_chart(figure, key="Third chart")
 
-    periods_medians = pd.DataFrame(
-        {
-            "Period": [
-                "1950-1980", 
-                "1950-1980",
-                "1981-1999",
-                "1981-1999",
-                "2000-2022",
-                "2000-2022"
-            ],
-            "Population": [
-                int(f_p["Urban Population"].median()),
-                int(f_p["Rural Population"].median()),
-                int(s_p["Urban Population"].median()),
-                int(s_p["Rural Population"].median()),
-                int(t_p["Urban Population"].median()),
-                int(t_p["Rural Population"].median())
-            ],
-            "Inhabitants": [
-                "Urban population",
-                "Rural population",
-                "Urban population",
-                "Rural population",
-                "Urban population",
-                "Rural population"
-            ]
-        }
-    )
+@st.fragment
+@concurrent_charts()
+def urban_rural_change():
+    st.subheader("Urban/rural population change")
 
-    figure = px.bar(periods_medians, x="Period", y="Population", color="Inhabitants", title="Median value of urban and rural population in China")
-    st.plotly_chart(figure, key="Fourth chart")
-    st.text("It's evident that the urban population has grown since 1950, driven by people moving to cities for improved living conditions.")
-    
-    increase_in_urban = pd.DataFrame(
-        {
-            "Year": [year for year in range(1950, 2023)],
-            "Increase": data["% Increase in Urban Population"]
-        }
-    )
+    bins = heatmap_bins("Urban/rural change")
 
-    figure = px.density_heatmap(increase_in_urban, x="Year", y="Increase")
-    st.write(figure)
+    show_chart(charts.change_heatmap, key="change % Increase in Urban Population", column="% Increase in Urban Population", bins=bins)
     st.text("It is interesting that urban population growth was most significant between 1980 and 2022.")
 
-    decrease_in_rural = pd.DataFrame(
-        {
-            "Year": [year for year in range(1950, 2023)],
-            "Increase": data["% Change in Rural Population"]
-        }
-    )
-
-    figure = px.density_heatmap(decrease_in_rural, x="Year", y="Increase")
-    st.write(figure)
+    show_chart(charts.change_heatmap, key="change % Change in Rural Population", column="% Change in Rural Population", bins=bins)
     st.text("Also, rural populations have experienced a consistent decline since 1950.")
 
-    st.text("These pie charts illustrate the urban/rural population distribution in China for specific time periods:")
-    figure = go.Figure()
-
-    figure.add_trace(go.Pie(
-        labels=['Urban', 'Rural'],
-        values=[f_p["Urban Population % of Total Population"].mean(), f_p["Rural Population % of Total Population"].mean()],
-        marker=dict(colors=['blue', 'lightblue']),
-        textinfo='percent',
-        textposition='inside'
-    ))
-
-    figure.update_layout(
-        title_text='Urba/rural population 1950-1980',
-        showlegend=False
-    )
-
-    st.write(figure)
-    st.text("The pie chart represents urban/rural population in period since 1950 to 1980")
 
-    figure = go.Figure()
+@st.fragment
+@concurrent_charts()
+def urban_rural_shares():
+    st.subheader("Urban/rural population shares")
 
-    figure.add_trace(go.Pie(
-        labels=['Urban', 'Rural'],
-        values=[s_p["Urban Population % of Total Population"].mean(), s_p["Rural Population % of Total Population"].mean()],
-        marker=dict(colors=['blue', 'lightblue']),
-        textinfo='percent',
-        textposition='inside'
-    ))
+    st.text("These pie charts illustrate the urban/rural population distribution in China for specific time periods:")
 
-    figure.update_layout(
-        title_text='Urba/rural population 1981-1999',
-        showlegend=False
-    )
+    for period in labels(breakpoints):
+        show_chart(charts.urban_rural_pie, key=f"pie {period}", breakpoints=breakpoints, period=period)
+        st.text(f"The pie chart represents urban/rural population in period {period}")
 
-    st.write(figure)
-    st.text("The pie chart represents urban/rural population in period since 1981 to 1999")
+    code = inspect.getsource(charts.urban_rural_pie)
 
-    figure = go.Figure()
+    st.text("Code for these pie charts:")
+    st.code(code, language="python")
 
-    figure.add_trace(go.Pie(
-        labels=['Urban', 'Rural'],
-        values=[t_p["Urban Population % of Total Population"].mean(), t_p["Rural Population % of Total Population"].mean()],
-        marker=dict(colors=['blue', 'lightblue']),
-        textinfo='percent',
-        textposition='inside'
-    ))
 
-    figure.update_layout(
-        title_text='Urba/rural population 2000-2022',
-        showlegend=False
-    )
+@st.fragment
+def rolling_statistics():
+    st.subheader("Rolling statistics")
 
-    st.write(figure)
-    st.text("The pie chart represents urban/rural population in period since 2000 to 2022")
+    st.text("Moving statistics smooth out single years and show how fast each series changes. Pick a column, a window size and the statistics to draw:")
 
-    code = '''
-    figure = go.Figure()
-
-    figure.add_trace(go.Pie(
-        labels=['Urban', 'Rural'],
-        values=[f_p["Urban Population % of Total Population"].mean(), f_p["Rural Population % of Total Population"].mean()],
-        marker=dict(colors=['blue', 'lightblue']),
-        textinfo='percent',
-        textposition='inside'
-    ))
-
-    figure.update_layout(
-        title_text='Urba/rural population 1950-1980',
-        showlegend=False
+    rolling_section(
+        data,
+        [
+            "Population", "Population Density", "Urban Population", "Rural Population", "Urban Share", "Rural Share",
+            "Population YoY %", "Urban Population YoY %",
+        ],
+        key="Population rolling",
+        budget=budget,
     )
 
-    st.write(figure)
-    '''
 
-    st.text("Code for one of these pie charts:")
-    st.code(code, language="python")
+@st.fragment
+def general_population_analysis():
+    st.subheader("Population analysis")
+
+    show_sections(
+        {
+            "Population trend": population_trend,
+            "Urban/rural comparison": urban_rural_comparison,
+            "Urban/rural change": urban_rural_change,
+            "Urban/rural shares": urban_rural_shares,
+            "Rolling statistics": rolling_statistics,
+        },
+        key="Population analysis section"
+    )
 
 
+@st.fragment
+@concurrent_charts()
 def first_hypothesis():
     st.subheader("First hypothesis")
 
@@ -246,11 +144,16 @@ def first_hypothesis():
 
     st.text("First, let's create a table with the data:")
 
+    urban = select(data, (1960, 2021))
+    # Urban figures start in 1960; the scatter plot and the correlations need a few of them.
+    enough_urban = urban["Urban Population"].notna().sum() >= 3
+    no_urban = "The selected years hold too little urban population data, which starts in 1960. Widen the year range in the sidebar."
+
     first_hypothesis = pd.DataFrame(
         {
-            "Year": [year for year in range(1960, 2022)],
-            "Urban population": data.loc[10:71, "Urban Population"],
-            "Population density": data.loc[10:71, "Population Density"],
+            "Year": urban["Year"],
+            "Urban population": urban["Urban Population"],
+            "Population density": urban["Population Density"],
         }
     )
 
@@ -259,11 +162,12 @@ def first_hypothesis():
     st.text("Code that renders the table:")
 
     code = '''
+    urban = select(data, (1960, 2021))
     first_hypothesis = pd.DataFrame(
         {
-            "Year": [year for year in range(1960, 2022)],
-            "Urban population": data.loc[10:71, "Urban Population"],
-            "Population density": data.loc[10:71, "Population Density"],
+            "Year": urban["Year"],
+            "Urban population": urban["Urban Population"],
+            "Population density": urban["Population Density"],
         }
     )
     '''
@@ -273,19 +177,32 @@ def first_hypothesis():
 
     st.text("Now, let's visualize both urban population and population density together using a 3D scatter plot:")
 
-    figure = px.scatter_3d(first_hypothesis, x="Population density", y="Urban population", z="Year", 
-                       color="Year", size="Urban population")
-
-    figure.update_layout(title="Growth in population density", 
-                    scene=dict(xaxis_title='Population density',
-                               yaxis_title='Urban population',
-                               zaxis_title='Year'))
-    
-    st.write(figure)
+    if enough_urban:
+        show_chart(charts.urban_density_scatter, key="urban density scatter", first=1960, last=2021)
+    else:
+        st.info(no_urban)
 
     st.text("It's evident that larger urban populations are associated with higher population densities in China.")
 
-    st.subheader("III. First hypothesis conclusion")
+    st.subheader("III. Correlations")
+
+    st.text("The heatmap below shows how every column of the dataset correlates with every other one. Pick any pair to look at it closely:")
+
+    if enough_urban:
+        correlation_section("First hypothesis correlations", pair=("Urban Population", "Population Density"))
+    else:
+        st.info(no_urban)
+
+    st.subheader("IV. Significance")
+
+    st.text("A strong correlation in one sample can still be chance. Bootstrap confidence intervals show how much the coefficient varies between resamples of the years, and permutation tests give the probability of a correlation at least this strong if the columns were unrelated:")
+
+    if enough_urban:
+        significance_table([("Urban Population", "Population Density")])
+    else:
+        st.info(no_urban)
+
+    st.subheader("V. First hypothesis conclusion")
 
     st.text("As expected, we see a strong relationship between urban population and population density, indicating that larger cities are more crowded.")
 
@@ -295,3 +212,5 @@ if categories == "Population analysis":
     general_population_analysis()
 else:
     first_hypothesis()
+
+profiling.panel()